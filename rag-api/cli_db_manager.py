@@ -18,7 +18,6 @@ Commands:
 
 import asyncio
 import argparse
-import json
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -26,11 +25,8 @@ from datetime import datetime
 # Add the project root to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.infrastructure.config import config_service
-from src.infrastructure.dependencies import get_chat_repository
-from src.adapters.repositories.sqlite_chat_repository import SQLiteChatSessionRepository
-from src.adapters.repositories.migration import ChatStorageMigration
-from src.infrastructure.database_setup import setup_database
+# Application modules are imported by the commands that need them: importing
+# the configuration connects to Milvus, which `--help` should not wait for
 
 
 class DatabaseCLI:
@@ -42,6 +38,9 @@ class DatabaseCLI:
     async def initialize(self):
         """Initialize the database connection."""
         print("🔄 Initializing database connection...")
+        from src.infrastructure.database_setup import setup_database
+        from src.adapters.repositories.sqlite_chat_repository import SQLiteChatSessionRepository
+        
         self.repository = await setup_database()
         
         if not isinstance(self.repository, SQLiteChatSessionRepository):
@@ -102,10 +101,7 @@ class DatabaseCLI:
                 print("❌ Invalid chat ID format")
                 return
         
-        export_data = await self.repository.export_chat_data(chat_uuid)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
+        export_data = await self.repository.export_chat_data_to_file(output_file, chat_uuid)
         
         print(f"✅ Export completed:")
         print(f"   Chats exported: {export_data['total_chats']}")
@@ -120,6 +116,7 @@ class DatabaseCLI:
             print(f"❌ File not found: {input_file}")
             return
         
+        from src.adapters.repositories.migration import ChatStorageMigration
         migration = ChatStorageMigration(self.repository)
         result = await migration.import_from_json(input_file)
         
@@ -147,9 +144,8 @@ class DatabaseCLI:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_path = f"{db_path}.backup_{timestamp}"
         
-        # Copy database file
-        import shutil
-        shutil.copy2(db_path, backup_path)
+        # Snapshot the database through SQLite so concurrent writes are safe
+        await self.repository.backup(backup_path)
         
         print(f"✅ Backup created: {backup_path}")
         
@@ -161,6 +157,7 @@ class DatabaseCLI:
         """Verify database integrity."""
         print("🔍 Verifying database integrity...")
         
+        from src.adapters.repositories.migration import ChatStorageMigration
         migration = ChatStorageMigration(self.repository)
         result = await migration.verify_migration()
         
@@ -258,4 +255,12 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop is optional; fall back to the default event loop where it is missing
+    try:
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+    
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
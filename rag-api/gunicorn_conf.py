@@ -0,0 +1,29 @@
+"""Gunicorn configuration for running the RAG API in production.
+
+Each request spends most of its time waiting on OpenAI and Milvus, so
+several Uvicorn worker processes are run side by side instead of a single
+server process. Usage: gunicorn main:app -c gunicorn_conf.py
+"""
+
+import os
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Picks up uvloop and httptools from uvicorn[standard] automatically
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Answers with several tool calls can take well over the default 30s
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# The app is imported in each worker (no preload) so that the OpenAI
+# clients and the Milvus gRPC connection are created after the fork.
+preload_app = False
+
+
+def on_starting(server):
+    """Warn about storage that cannot be shared between worker processes."""
+    if workers > 1 and os.getenv("STORAGE_TYPE", "sqlite") == "memory":
+        print("⚠️  STORAGE_TYPE=memory keeps chats per worker process.")
+        print("   Use STORAGE_TYPE=sqlite or redis, or set WEB_CONCURRENCY=1.")
@@ -1,10 +1,39 @@
 import os
+import glob
 import json
+import mmap
+import multiprocessing
 import datetime
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pymilvus import connections, FieldSchema, CollectionSchema, DataType, utility, Collection
 from openai import OpenAI
 import numpy as np
 
+# simdjson parses large documents several times faster than the stdlib parser;
+# orjson is the next best choice where no simdjson wheel is available
+# orjson also parses straight from a memory-mapped buffer
+_PARSES_BUFFERS = False
+try:
+    import simdjson
+    _json_loads = simdjson.loads
+except ImportError:
+    try:
+        import orjson
+        _json_loads = orjson.loads
+        _PARSES_BUFFERS = True
+    except ImportError:
+        _json_loads = json.loads
+
+# ijson lets us stream records instead of holding the whole corpus in memory
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # Import configuration
 import sys
 sys.path.append("..")
@@ -24,28 +53,45 @@ client = OpenAI(api_key=api_key)
 # Configure paths
 DATA_DIR = "./data"
 ABSTRACT_DATA_PATH = os.path.join(DATA_DIR, "processed_data.json")
+# Read size for streamed input; the default 8 KB buffer means many small reads on large corpora
+READ_BUFFER_SIZE = 1 << 20
+# Documents left out of the collection, one JSON object per line
+QUARANTINE_PATH = os.path.join(DATA_DIR, "quarantine.jsonl")
+# Pre-split corpus loaded by a pool of processes, e.g. produced with
+#   jq -c '.[]' processed_data.json | split -l 100000 -d --additional-suffix=.ndjson - processed_data.part-
+SHARD_PATTERN = os.path.join(DATA_DIR, "processed_data.part-*.ndjson")
+SHARD_PROCESSES = min(4, os.cpu_count() or 1)
 
-def get_embedding(text, model=config.EMBEDDING_MODEL):
-    """Gets the embedding of a text using OpenAI."""
-    # Make sure the text is not None or empty
-    if not text:
-        text = "Empty content"
-    
-    # Clean the text
-    text = text.replace("\n", " ").strip()
+# Texts embedded per OpenAI request
+EMBEDDING_REQUEST_SIZE = 100
+# Upper bound on the vector payload of one insert; Milvus rejects gRPC messages over 64 MB
+INSERT_BATCH_BYTES = 32 * 1024 * 1024
+MAX_INSERT_BATCH_SIZE = 10000
+# Concurrent insert requests, each worker on its own Milvus connection
+INSERT_WORKERS = 4
+INSERT_ALIAS_PREFIX = "insert-"
+
+# Seconds between progress reports
+PROGRESS_INTERVAL = 10.0
+
+_insert_worker = threading.local()
+_insert_worker_ids = itertools.count(1)
+
+def get_embeddings(texts, model=config.EMBEDDING_MODEL):
+    """Gets the embeddings of several texts with a single OpenAI request."""
+    # Clean the texts and make sure none is empty
+    inputs = [(text or "").replace("\n", " ").strip() or "Empty content" for text in texts]
     
-    # Use the correct format for OpenAI API v1.0+
     try:
         response = client.embeddings.create(
-            input=text,  # Simple string, not a list
+            input=inputs,
             model=model
         )
-        return response.data[0].embedding
+        return [item.embedding for item in response.data]
     except Exception as e:
-        print(f"Error generating embedding: {e}")
-        # Return a zero vector as fallback
-        # Use the dimension configured in config.py
-        return [0.0] * config.EMBEDDING_DIMENSION
+        print(f"Error generating embeddings: {e}")
+        # A zero vector has no cosine similarity to anything; leave these documents out
+        return [None] * len(texts)
 
 def connect_to_milvus():
     """Connects to Milvus."""
@@ -64,6 +110,30 @@ def connect_to_milvus():
         print(f"Error connecting to Milvus: {e}")
         raise
 
+def _connect_insert_worker():
+    """Opens a dedicated Milvus connection for the calling insert worker thread."""
+    _insert_worker.alias = f"{INSERT_ALIAS_PREFIX}{next(_insert_worker_ids)}"
+    _insert_worker.collections = {}
+    connections.connect(
+        alias=_insert_worker.alias,
+        host=config.MILVUS_HOST,
+        port=config.MILVUS_PORT
+    )
+
+def _disconnect_insert_workers():
+    """Closes the connections opened by insert workers."""
+    for alias, _ in connections.list_connections():
+        if alias.startswith(INSERT_ALIAS_PREFIX):
+            connections.disconnect(alias)
+
+def _worker_collection(collection):
+    """Returns the collection bound to the current insert worker's connection."""
+    worker_collection = _insert_worker.collections.get(collection.name)
+    if worker_collection is None:
+        worker_collection = Collection(collection.name, using=_insert_worker.alias)
+        _insert_worker.collections[collection.name] = worker_collection
+    return worker_collection
+
 def check_existing_collection_dimension(collection_name):
     """
     Checks if a collection already exists and gets its embedding dimension.
@@ -143,48 +213,242 @@ def load_data(filepath):
         print(f"File {filepath} does not exist")
         return []
     
-    with open(filepath, "r") as f:
-        data = json.load(f)
+    # Hand the raw bytes to the parser; it validates UTF-8 itself
+    with open(filepath, "rb") as f:
+        if _PARSES_BUFFERS and os.path.getsize(filepath):
+            # Parse from the page cache instead of copying the file into a bytes object
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                data = _json_loads(view)
+        else:
+            data = _json_loads(f.read())
     
     print(f"Loaded {len(data)} documents from {filepath}")
     return data
 
-def process_and_insert_data(collection, data, start_id=0):
-    """Processes data and inserts it into the collection according to its schema."""
-    # Determine batch size to process and insert in parts
-    batch_size = 100  # Adjust as needed
-    batch_count = (len(data) + batch_size - 1) // batch_size
+def iter_records(filepath):
+    """
+    Yields documents from a JSON array, a JSON object or an NDJSON file one at a time.
     
-    print("Generating embeddings... (this may take several minutes)")
+    Records are streamed with ijson when it is installed, so memory use stays
+    bounded by the insert batch rather than by the size of the corpus.
+    """
+    if not os.path.exists(filepath):
+        print(f"File {filepath} does not exist")
+        return
     
-    # Counter for all processed documents
-    processed_count = 0
+    if filepath.endswith((".ndjson", ".jsonl")):
+        with open(filepath, "rb", buffering=READ_BUFFER_SIZE) as f:
+            for line in f:
+                if line.strip():
+                    yield _json_loads(line)
+        return
+    
+    if ijson is None:
+        data = load_data(filepath)
+        yield from (data.values() if isinstance(data, dict) else data)
+        return
     
+    with open(filepath, "rb") as f:
+        # Top-level objects map document keys to documents
+        is_object = f.read(64).lstrip().startswith(b"{")
+        f.seek(0)
+        if is_object:
+            for _, item in ijson.kvitems(f, "", use_float=True, buf_size=READ_BUFFER_SIZE):
+                yield item
+        else:
+            yield from ijson.items(f, "item", use_float=True, buf_size=READ_BUFFER_SIZE)
+
+def _insert_rows(collection, columns):
+    """
+    Inserts columns, bisecting a rejected batch to isolate the rows Milvus refuses.
+    
+    Returns:
+        tuple: Number of inserted and rejected rows
+    """
+    try:
+        return collection.insert(columns).insert_count, 0
+    except Exception as e:
+        rows = len(columns[0])
+        if rows == 1:
+            print(f"Rejected document with id {columns[0][0]}: {e}")
+            return 0, 1
+        
+        middle = rows // 2
+        inserted_left, failed_left = _insert_rows(collection, [column[:middle] for column in columns])
+        inserted_right, failed_right = _insert_rows(collection, [column[middle:] for column in columns])
+        return inserted_left + inserted_right, failed_left + failed_right
+
+def _insert_batch(collection, columns, batch_number):
+    """Inserts a batch of columns in schema order, reporting failures without aborting the build."""
+    inserted, failed = _insert_rows(_worker_collection(collection), columns)
+    # Successful batches are covered by the periodic progress report
+    if failed:
+        print(f"Batch {batch_number} inserted: {inserted} documents, {failed} rejected")
+    return inserted, failed
+
+def _truncate_utf8(value, max_bytes):
+    """Truncates a string to the byte length Milvus allows for a VARCHAR field."""
+    # Four bytes per character is the UTF-8 worst case, so short strings skip encoding
+    if len(value) * 4 <= max_bytes:
+        return value
+    encoded = value.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return value
+    return encoded[:max_bytes].decode("utf-8", "ignore")
+
+# Record keys mapped to schema columns; every other key goes to the JSON field
+_SOURCE_ABSTRACT_KEYS = frozenset([
+    "Text", "Title", "ID", "Type", "Link", "Page",
+    "text", "title", "source_id", "type", "link", "page"
+])
+_GENERIC_CONTENT_KEYS = frozenset(["content", "text"])
+
+def _as_str(value):
+    """Returns JSON strings unchanged and coerces anything else for VARCHAR fields."""
+    if isinstance(value, str):
+        return value
+    return "" if value is None else str(value)
+
+def _as_int(value):
+    """Returns JSON integers unchanged and coerces anything else for INT64 fields."""
+    if isinstance(value, int):
+        return value
+    return int(value or 0)
+
+def _append_row(batch_data, is_source_abstract, doc_id, text_content, item):
+    """Appends one document to the batch columns according to the collection schema."""
+    # Compute every value before appending so a bad record cannot misalign the columns
+    if is_source_abstract:
+        # Schema for source_abstract
+        # Chunks of the same source repeat these values; interning shares one object per value
+        title = sys.intern(_as_str(item.get("Title") or item.get("title")))
+        source_id = sys.intern(_as_str(item.get("ID") or item.get("source_id")))
+        doc_type = sys.intern(_as_str(item.get("Type") or item.get("type")))
+        link = sys.intern(_as_str(item.get("Link") or item.get("link")))
+        page = _as_int(item.get("Page") or item.get("page"))
+        
+        # Dynamic fields as JSON
+        dynamic_data = {k: v for k, v in item.items() if k not in _SOURCE_ABSTRACT_KEYS}
+        
+        batch_data["id"].append(doc_id)
+        batch_data["text"].append(text_content)
+        batch_data["title"].append(title)
+        batch_data["source_id"].append(source_id)
+        batch_data["type"].append(doc_type)
+        batch_data["link"].append(link)
+        batch_data["page"].append(page)
+        batch_data["dynamic_field"].append(dynamic_data)
+    else:
+        # Schema for other collections (content and metadata)
+        # Build metadata as JSON
+        metadata = {k: v for k, v in item.items() if k not in _GENERIC_CONTENT_KEYS}
+        
+        batch_data["id"].append(doc_id)
+        batch_data["content"].append(text_content)
+        batch_data["metadata"].append(json.dumps(metadata))
+
+def process_and_insert_data(collection, records, start_id=0, quarantine_path=QUARANTINE_PATH):
+    """Processes records and inserts them into the collection according to its schema."""
     # Determine collection schema
     collection_schema = collection.schema
     field_names = [field.name for field in collection_schema.fields]
     is_source_abstract = "text" in field_names and "source_id" in field_names
+    embedding_index = field_names.index("embedding")
+    dimension = next(field.dim for field in collection_schema.fields if field.name == "embedding")
+    varchar_limits = {
+        field.name: field.params["max_length"]
+        for field in collection_schema.fields
+        if field.dtype == DataType.VARCHAR
+    }
     
-    for batch_idx in range(batch_count):
-        batch_start = batch_idx * batch_size
-        batch_end = min((batch_idx + 1) * batch_size, len(data))
-        batch_items = list(data.values())[batch_start:batch_end] if isinstance(data, dict) else data[batch_start:batch_end]
-        
-        # Initialize lists for this batch according to schema
-        batch_data = {"id": []}  # ID is always present
+    # Size batches so the float32 vectors stay within the insert message budget
+    batch_size = max(1, min(MAX_INSERT_BATCH_SIZE, INSERT_BATCH_BYTES // (dimension * 4)))
+    
+    print("Generating embeddings... (this may take several minutes)")
+    
+    # Counters for all processed, inserted, rejected and quarantined documents
+    processed_count = 0
+    inserted_count = 0
+    failed_count = 0
+    quarantined_count = 0
+    batch_number = 0
+    
+    def new_batch():
+        # One list per field in schema order, inserted positionally; embeddings
+        # are packed into a float32 buffer instead of lists of Python floats
+        columns = [[] for _ in field_names]
+        embedding_buffer = np.empty((batch_size, dimension), dtype=np.float32)
+        return columns, dict(zip(field_names, columns)), embedding_buffer
+    
+    quarantine_file = None
+    
+    def quarantine(doc_number, reason, item):
+        nonlocal quarantine_file, quarantined_count
+        print(f"Skipping document #{doc_number} - {reason}")
+        if quarantine_file is None:
+            quarantine_file = open(quarantine_path, "w")
+        quarantine_file.write(json.dumps({"document": doc_number, "reason": reason, "record": item}, default=str) + "\n")
+        quarantined_count += 1
+    
+    columns, batch_data, embedding_buffer = new_batch()
+    # Documents waiting for their embeddings: (doc_number, text, item)
+    pending = []
+    in_flight = deque()
+    
+    # Separate connections keep concurrent inserts from queueing on one gRPC channel
+    with ThreadPoolExecutor(max_workers=INSERT_WORKERS, initializer=_connect_insert_worker) as pool:
+        def collect(future):
+            nonlocal inserted_count, failed_count
+            inserted, failed = future.result()
+            inserted_count += inserted
+            failed_count += failed
         
-        # Initialize lists according to schema
-        for field in field_names:
-            if field != "id":  # ID is already initialized
-                batch_data[field] = []
+        def flush():
+            nonlocal columns, batch_data, embedding_buffer, batch_number
+            batch_number += 1
+            columns[embedding_index] = embedding_buffer[:len(batch_data["id"])]
+            # Truncate oversized strings column by column so one long value cannot sink the batch
+            for name, limit in varchar_limits.items():
+                column = batch_data[name]
+                column[:] = [_truncate_utf8(value, limit) for value in column]
+            # Bound the number of batches held in memory while inserts are in flight
+            if len(in_flight) >= INSERT_WORKERS:
+                collect(in_flight.popleft())
+            in_flight.append(pool.submit(_insert_batch, collection, columns, batch_number))
+            # The submitted batch now belongs to the worker; keep filling a fresh one
+            columns, batch_data, embedding_buffer = new_batch()
         
-        print(f"Processing batch {batch_idx+1}/{batch_count} (documents {batch_start+1}-{batch_end})")
+        def embed_pending():
+            nonlocal processed_count
+            embeddings = get_embeddings([text for _, text, _ in pending])
+            for (doc_number, text_content, item), embedding in zip(pending, embeddings):
+                if embedding is None:
+                    quarantine(doc_number, "no embedding", item)
+                    continue
+                # Check the dimension here so one bad vector cannot fail a whole insert
+                if len(embedding) != dimension:
+                    quarantine(doc_number, f"embedding dimension {len(embedding)}, expected {dimension}", item)
+                    continue
+                
+                try:
+                    embedding_buffer[len(batch_data["id"])] = embedding
+                    _append_row(batch_data, is_source_abstract, start_id + processed_count, text_content, item)
+                    processed_count += 1
+                except Exception as e:
+                    print(f"Error processing document #{doc_number}: {e}")
+                
+                if len(batch_data["id"]) >= batch_size:
+                    flush()
+            pending.clear()
         
-        for i, item in enumerate(batch_items):
-            if i % 10 == 0:
-                print(f"Processing document {batch_start+i+1}/{len(data)}")
+        last_report = time.monotonic()
+        for doc_number, item in enumerate(records, start=1):
+            # Report progress on a timer rather than writing to stdout for every few documents
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                print(f"Processed {processed_count} documents, {batch_number} batches submitted")
             
-            # Generate the embedding first to verify if we can continue
             text_content = ""
             if "Text" in item:
                 text_content = item["Text"]
@@ -194,68 +458,89 @@ def process_and_insert_data(collection, data, start_id=0):
                 text_content = item["content"]
             
             if not text_content:
-                print(f"Skipping document #{batch_start+i+1} - no content")
+                print(f"Skipping document #{doc_number} - no content")
                 continue
-                
-            try:
-                embedding = get_embedding(text_content)
-                
-                # Add ID to the data list
-                batch_data["id"].append(start_id + processed_count)
-                batch_data["embedding"].append(embedding)
-                
-                # Process data according to collection schema
-                if is_source_abstract:
-                    # Schema for source_abstract
-                    batch_data["text"].append(text_content)
-                    batch_data["title"].append(item.get("Title", "") or item.get("title", ""))
-                    batch_data["source_id"].append(item.get("ID", "") or item.get("source_id", ""))
-                    batch_data["type"].append(item.get("Type", "") or item.get("type", ""))
-                    batch_data["link"].append(item.get("Link", "") or item.get("link", ""))
-                    batch_data["page"].append(int(item.get("Page", 0) or item.get("page", 0) or 0))
-                    
-                    # Dynamic fields as JSON
-                    dynamic_data = {}
-                    for k, v in item.items():
-                        if k not in ["Text", "Title", "ID", "Type", "Link", "Page", "text", "title", "source_id", "type", "link", "page"]:
-                            dynamic_data[k] = v
-                    batch_data["dynamic_field"].append(dynamic_data)
-                else:
-                    # Schema for other collections (content and metadata)
-                    content = text_content
-                    batch_data["content"].append(content)
-                    
-                    # Build metadata as JSON
-                    metadata = {}
-                    for k, v in item.items():
-                        if k not in ["content", "text"]:
-                            metadata[k] = v
-                    batch_data["metadata"].append(json.dumps(metadata))
-                
-                processed_count += 1
-            except Exception as e:
-                print(f"Error processing document #{batch_start+i+1}: {e}")
+            
+            pending.append((doc_number, _as_str(text_content), item))
+            if len(pending) >= EMBEDDING_REQUEST_SIZE:
+                embed_pending()
         
-        # If we have data in this batch, insert it
+        # Embed and insert the remaining partial batch
+        if pending:
+            embed_pending()
         if batch_data["id"]:
-            try:
-                collection.insert(batch_data)
-                print(f"Batch {batch_idx+1}/{batch_count} inserted: {len(batch_data['id'])} documents")
-            except Exception as e:
-                print(f"Error inserting batch {batch_idx+1}: {e}")
+            flush()
+        
+        for future in in_flight:
+            collect(future)
+    _disconnect_insert_workers()
+    
+    if quarantine_file is not None:
+        quarantine_file.close()
+        print(f"{quarantined_count} documents quarantined in {quarantine_path}")
+    
+    # Seal the inserted segments once, after all batches are in
+    collection.flush()
+    print(f"Total documents inserted: {inserted_count}, rejected: {failed_count}")
     
     return processed_count  # Return total number of documents processed
 
+def _count_lines(filepath):
+    """Counts the records of an NDJSON file without parsing them."""
+    count = 0
+    last_block = b""
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(READ_BUFFER_SIZE), b""):
+            count += block.count(b"\n")
+            last_block = block
+    # A final record without a trailing newline still needs an id
+    if last_block and not last_block.endswith(b"\n"):
+        count += 1
+    return count
+
+def _load_shard(shard):
+    """Parses and inserts one NDJSON shard in a worker process."""
+    filepath, start_id = shard
+    connect_to_milvus()
+    try:
+        collection = Collection(config.ABSTRACT_COLLECTION)
+        quarantine_path = os.path.splitext(filepath)[0] + ".quarantine.jsonl"
+        return process_and_insert_data(collection, iter_records(filepath), start_id, quarantine_path)
+    finally:
+        connections.disconnect("default")
+
+def load_shards(shard_paths):
+    """
+    Loads NDJSON shards in parallel, one process per shard at a time.
+    
+    Each shard gets a contiguous block of ids starting after the lines of
+    the shards before it, so the ids do not depend on scheduling order.
+    """
+    start_ids = itertools.accumulate((_count_lines(path) for path in shard_paths[:-1]), initial=0)
+    
+    # Spawn rather than fork: the parent already holds gRPC and HTTP connections
+    with multiprocessing.get_context("spawn").Pool(SHARD_PROCESSES) as pool:
+        return sum(pool.map(_load_shard, zip(shard_paths, start_ids)))
+
 def create_index_and_load(collection):
-    """Creates an index and loads the collection into memory."""
+    """
+    Creates the index once all data is flushed and loads the collection into memory.
+    
+    The index is built over the sealed segments in one pass instead of being
+    maintained while batches are still arriving. A collection reused from a
+    previous build keeps its existing index.
+    """
     index_params = {
         "metric_type": "COSINE",
         "index_type": "HNSW",
-        "params": {"M": 8, "efConstruction": 200}
+        "params": {"M": 16, "efConstruction": 200}
     }
     
-    collection.create_index("embedding", index_params)
-    print("Index created")
+    if collection.has_index():
+        print("Index already exists")
+    else:
+        collection.create_index("embedding", index_params)
+        print("Index created")
     
     collection.load()
     print(f"Collection loaded with {collection.num_entities} entities")
@@ -269,8 +554,11 @@ def main():
     
     # Check if there's any alternative data path
     # In case the file is in the project root or if there is transformed data
+    abstract_data_path = ABSTRACT_DATA_PATH
+    docs_processed = 0
     if not os.path.exists(ABSTRACT_DATA_PATH):
         alt_paths = [
+            os.path.join(DATA_DIR, "processed_data.ndjson"),
             "./processed_data.json",
             "../processed_data.json",
             os.path.join(DATA_DIR, "abstracts_data.json"),
@@ -281,22 +569,27 @@ def main():
                 print(f"Using alternative path for data: {path}")
                 abstract_data_path = path
                 break
-    else:
-        abstract_data_path = ABSTRACT_DATA_PATH
     
-    # Load data from processed_data.json
-    abstract_data = load_data(abstract_data_path)
-    if abstract_data:
+    # Sharded NDJSON input takes precedence over a single data file
+    shard_paths = sorted(glob.glob(SHARD_PATTERN))
+    
+    # Stream data from processed_data.json
+    if shard_paths or os.path.exists(abstract_data_path):
         # Create the collection
         abstract_collection = create_collection(config.ABSTRACT_COLLECTION)
         
         # Process and insert data
-        docs_processed = process_and_insert_data(abstract_collection, abstract_data)
+        if shard_paths:
+            print(f"Loading {len(shard_paths)} shards with {SHARD_PROCESSES} processes")
+            docs_processed = load_shards(shard_paths)
+        else:
+            docs_processed = process_and_insert_data(abstract_collection, iter_records(abstract_data_path))
         print(f"Total documents processed: {docs_processed}")
         
-        # Create index and load the collection
-        create_index_and_load(abstract_collection)
-        created_collection = True
+        if docs_processed:
+            # Create index and load the collection
+            create_index_and_load(abstract_collection)
+            created_collection = True
     
     # If no data was found to import, create an empty collection as fallback
     if not created_collection:
@@ -322,7 +615,7 @@ def main():
         "database": config.MILVUS_DATABASE,
         "collection": {
             "name": config.ABSTRACT_COLLECTION,
-            "documents": len(abstract_data) if abstract_data else 0
+            "documents": docs_processed
         }
     }
     
@@ -6,9 +6,8 @@ from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Depends
 from fastapi.responses import FileResponse
 import tempfile
 import os
-import json
 
-from ...infrastructure.dependencies import get_chat_repository
+from ...infrastructure.dependencies import get_chat_repository, get_cache_statistics
 from ...infrastructure.auth import require_api_key
 from ...adapters.repositories.sqlite_chat_repository import SQLiteChatSessionRepository
 from ...adapters.repositories.migration import ChatStorageMigration
@@ -30,6 +29,13 @@ class AdminController:
             response_model=Dict[str, Any],
             dependencies=[Depends(require_api_key)]
         )
+        self.router.add_api_route(
+            "/cache/stats",
+            self.get_cache_statistics,
+            methods=["GET"],
+            response_model=Dict[str, Any],
+            dependencies=[Depends(require_api_key)]
+        )
         self.router.add_api_route(
             "/search",
             self.search_messages,
@@ -63,6 +69,13 @@ class AdminController:
             dependencies=[Depends(require_api_key)]
         )
     
+    async def get_cache_statistics(self) -> Dict[str, Any]:
+        """Get cache statistics for this worker process."""
+        return {
+            "status": "success",
+            "data": get_cache_statistics()
+        }
+    
     async def get_statistics(self) -> Dict[str, Any]:
         """Get comprehensive database statistics."""
         repository = get_chat_repository()
@@ -131,10 +144,9 @@ class AdminController:
                     raise HTTPException(status_code=400, detail="Invalid chat ID format")
             
             # Create temporary file for export
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as tmp_file:
-                export_data = await repository.export_chat_data(chat_uuid)
-                json.dump(export_data, tmp_file, indent=2, ensure_ascii=False)
+            with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp_file:
                 tmp_file_path = tmp_file.name
+            export_data = await repository.export_chat_data_to_file(tmp_file_path, chat_uuid)
             
             # Determine filename
             if chat_uuid:
@@ -227,9 +239,8 @@ class AdminController:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = f"{db_path}.backup_{timestamp}"
             
-            # Copy database file
-            import shutil
-            shutil.copy2(db_path, backup_path)
+            # Snapshot the database through SQLite so concurrent writes are safe
+            await repository.backup(backup_path)
             
             # Get statistics for the backup
             stats = await repository.get_chat_statistics()
@@ -1,14 +1,23 @@
 """FastAPI controllers for the RAG API."""
 
-from typing import List
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from uuid import UUID
 from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from ...application.use_cases import ChatSessionUseCase, QuestionAnsweringUseCase
 from ...infrastructure.auth import require_api_key
-from .dto import ChatSessionDTO, MessageDTO, QuestionRequestDTO, ChatRequestDTO, ErrorResponseDTO
+from .dto import (
+    CHAT_SESSION_LIST_ADAPTER,
+    BatchQuestionRequestDTO,
+    ChatSessionDTO,
+    MessageDTO,
+    QuestionRequestDTO,
+    ChatRequestDTO,
+    ErrorResponseDTO
+)
 from .mappers import ChatSessionMapper, MessageMapper, QuestionMapper
+from .streaming import answer_stream_response
 
 
 class ChatController:
@@ -49,10 +58,11 @@ class ChatController:
             dependencies=[Depends(require_api_key)]
         )
     
-    async def list_chats(self, session_id: str = Query(None, description="Session ID to filter chats")) -> List[ChatSessionDTO]:
+    async def list_chats(self, session_id: str = Query(None, description="Session ID to filter chats")) -> Response:
         """List all chat sessions, optionally filtered by session ID."""
         chat_sessions = await self._chat_use_case.list_chat_sessions(session_id=session_id)
-        return [ChatSessionMapper.to_dto(chat) for chat in chat_sessions]
+        dtos = [ChatSessionMapper.to_dto(chat) for chat in chat_sessions]
+        return Response(content=CHAT_SESSION_LIST_ADAPTER.dump_json(dtos), media_type="application/json")
     
     async def create_chat(self, chat_request: ChatRequestDTO) -> ChatSessionDTO:
         """Create a new chat session."""
@@ -62,7 +72,7 @@ class ChatController:
         )
         return ChatSessionMapper.to_dto(chat_session)
     
-    async def get_chat(self, chat_id: str) -> ChatSessionDTO:
+    async def get_chat(self, chat_id: str) -> Response:
         """Get a specific chat session."""
         try:
             chat_uuid = UUID(chat_id)
@@ -73,7 +83,8 @@ class ChatController:
         if not chat_session:
             raise HTTPException(status_code=404, detail="Chat not found")
         
-        return ChatSessionMapper.to_dto(chat_session)
+        # The DTO is already valid; dump it directly instead of re-validating the history
+        return Response(content=ChatSessionMapper.to_dto(chat_session).model_dump_json(), media_type="application/json")
     
     async def delete_chat(self, chat_id: str):
         """Delete a chat session."""
@@ -92,6 +103,9 @@ class ChatController:
 class QuestionController:
     """Controller for question answering operations."""
     
+    # Questions accepted per batch request
+    MAX_BATCH_QUESTIONS = 32
+    
     def __init__(self, qa_use_case: QuestionAnsweringUseCase):
         self._qa_use_case = qa_use_case
         self.router = APIRouter(prefix="/chats", tags=["questions"])
@@ -106,6 +120,19 @@ class QuestionController:
             response_model=MessageDTO,
             dependencies=[Depends(require_api_key)]
         )
+        self.router.add_api_route(
+            "/{chat_id}/messages/stream",
+            self.stream_message,
+            methods=["POST"],
+            dependencies=[Depends(require_api_key)]
+        )
+        self.router.add_api_route(
+            "/{chat_id}/messages/batch",
+            self.add_messages,
+            methods=["POST"],
+            response_model=List[MessageDTO],
+            dependencies=[Depends(require_api_key)]
+        )
     
     async def add_message(
         self,
@@ -146,12 +173,60 @@ class QuestionController:
                 error_message = "There is a problem with the vector dimensions. Please verify the configuration."
             
             raise HTTPException(status_code=500, detail=error_message)
+    
+    async def add_messages(self, chat_id: str, batch_request: BatchQuestionRequestDTO) -> List[MessageDTO]:
+        """Answer a batch of questions with one embedding request and add them to the chat."""
+        try:
+            chat_uuid = UUID(chat_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid chat ID format")
+        
+        if len(batch_request.questions) > self.MAX_BATCH_QUESTIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {self.MAX_BATCH_QUESTIONS} questions can be sent in one batch"
+            )
+        
+        try:
+            response_messages = await self._qa_use_case.process_questions(chat_uuid, batch_request.questions)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except Exception:
+            raise HTTPException(status_code=500, detail="Could not process the questions. Please try again.")
+        
+        return [MessageMapper.to_dto(message) for message in response_messages]
+    
+    async def stream_message(
+        self,
+        chat_id: str,
+        question_request: QuestionRequestDTO,
+        use_tools: bool = Query(True, description="Whether to use the tool calling approach")
+    ) -> StreamingResponse:
+        """Process a question, streaming the answer as Server-Sent Events."""
+        try:
+            chat_uuid = UUID(chat_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid chat ID format")
+        
+        question = QuestionMapper.from_request(chat_uuid, question_request)
+        try:
+            events = await self._qa_use_case.stream_question(question, use_tools=use_tools)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        
+        return answer_stream_response(events)
 
 
 class HealthController:
     """Controller for health check operations."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache_stats_provider: Optional[Callable[[], Dict[str, Any]]] = None,
+        readiness_check: Optional[Callable[[], Awaitable[bool]]] = None
+    ):
+        self._cache_stats_provider = cache_stats_provider
+        self._readiness_check = readiness_check
         self.router = APIRouter(tags=["health"])
         self._setup_routes()
     
@@ -162,7 +237,21 @@ class HealthController:
             self.health_check,
             methods=["GET"]
         )
+        self.router.add_api_route(
+            "/ready",
+            self.readiness,
+            methods=["GET"]
+        )
     
     async def health_check(self):
         """Health check endpoint."""
-        return {"status": "online", "message": "RAG API is running"}
+        response = {"status": "online", "message": "RAG API is running"}
+        if self._cache_stats_provider is not None:
+            response["caches"] = self._cache_stats_provider()
+        return response
+    
+    async def readiness(self):
+        """Readiness endpoint: 503 until the worker can serve questions."""
+        if self._readiness_check is not None and not await self._readiness_check():
+            return JSONResponse(status_code=503, content={"status": "not ready"})
+        return {"status": "ready"}
@@ -1,6 +1,6 @@
 """DTOs (Data Transfer Objects) for API communication."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import List, Optional, Dict, Any
 from uuid import UUID
 
@@ -23,12 +23,22 @@ class ChatSessionDTO(BaseModel):
     updated_at: Optional[str] = None
 
 
+# Built once at import; serialising through it skips FastAPI's per-response
+# validation of every chat and message in the list
+CHAT_SESSION_LIST_ADAPTER = TypeAdapter(List[ChatSessionDTO])
+
+
 class QuestionRequestDTO(BaseModel):
     """DTO for question requests."""
     question: str
     session_id: Optional[str] = None
 
 
+class BatchQuestionRequestDTO(BaseModel):
+    """DTO for batches of questions answered together."""
+    questions: List[str]
+
+
 class ChatRequestDTO(BaseModel):
     """DTO for chat creation requests."""
     title: str = "New conversation"
@@ -3,12 +3,13 @@
 from typing import List
 from uuid import UUID
 from fastapi import APIRouter, HTTPException, Depends, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from ...application.use_cases import ChatSessionUseCase, QuestionAnsweringUseCase
 from ...infrastructure.auth import require_frontend_access
-from ..controllers.dto import ChatSessionDTO, MessageDTO, QuestionRequestDTO, ChatRequestDTO
+from ..controllers.dto import CHAT_SESSION_LIST_ADAPTER, ChatSessionDTO, MessageDTO, QuestionRequestDTO, ChatRequestDTO
 from ..controllers.mappers import ChatSessionMapper, MessageMapper, QuestionMapper
+from ..controllers.streaming import answer_stream_response
 
 
 class FrontendController:
@@ -57,11 +58,18 @@ class FrontendController:
             response_model=MessageDTO,
             dependencies=[Depends(require_frontend_access)]
         )
+        self.router.add_api_route(
+            "/chats/{chat_id}/messages/stream",
+            self.stream_message,
+            methods=["POST"],
+            dependencies=[Depends(require_frontend_access)]
+        )
 
-    async def list_chats(self, session_id: str = Query(None, description="Session ID to filter chats")) -> List[ChatSessionDTO]:
+    async def list_chats(self, session_id: str = Query(None, description="Session ID to filter chats")) -> Response:
         """List all chat sessions, optionally filtered by session ID."""
         chat_sessions = await self._chat_use_case.list_chat_sessions(session_id=session_id)
-        return [ChatSessionMapper.to_dto(chat) for chat in chat_sessions]
+        dtos = [ChatSessionMapper.to_dto(chat) for chat in chat_sessions]
+        return Response(content=CHAT_SESSION_LIST_ADAPTER.dump_json(dtos), media_type="application/json")
     
     async def create_chat(self, chat_request: ChatRequestDTO) -> ChatSessionDTO:
         """Create a new chat session."""
@@ -71,7 +79,7 @@ class FrontendController:
         )
         return ChatSessionMapper.to_dto(chat_session)
     
-    async def get_chat(self, chat_id: str) -> ChatSessionDTO:
+    async def get_chat(self, chat_id: str) -> Response:
         """Get a specific chat session."""
         try:
             chat_uuid = UUID(chat_id)
@@ -82,7 +90,8 @@ class FrontendController:
         if not chat_session:
             raise HTTPException(status_code=404, detail="Chat not found")
         
-        return ChatSessionMapper.to_dto(chat_session)
+        # The DTO is already valid; dump it directly instead of re-validating the history
+        return Response(content=ChatSessionMapper.to_dto(chat_session).model_dump_json(), media_type="application/json")
     
     async def delete_chat(self, chat_id: str):
         """Delete a chat session."""
@@ -136,3 +145,23 @@ class FrontendController:
                 error_message = "There is a problem with the vector dimensions. Please verify the configuration."
             
             raise HTTPException(status_code=500, detail=error_message)
+    
+    async def stream_message(
+        self,
+        chat_id: str,
+        question_request: QuestionRequestDTO,
+        use_tools: bool = Query(True, description="Whether to use the tool calling approach")
+    ) -> StreamingResponse:
+        """Process a question, streaming the answer as Server-Sent Events."""
+        try:
+            chat_uuid = UUID(chat_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid chat ID format")
+        
+        question = QuestionMapper.from_request(chat_uuid, question_request)
+        try:
+            events = await self._qa_use_case.stream_question(question, use_tools=use_tools)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        
+        return answer_stream_response(events)
@@ -0,0 +1,53 @@
+"""Server-Sent Events helpers for streamed answers."""
+
+import logging
+import json
+from typing import Any, AsyncIterator, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+from .mappers import MessageMapper
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    if orjson is not None:
+        payload = orjson.dumps(jsonable_encoder(data)).decode()
+    else:
+        payload = json.dumps(jsonable_encoder(data), ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def _answer_events(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            if event["type"] == "delta":
+                yield format_event("delta", {"content": event["content"]})
+            elif event["type"] == "done":
+                yield format_event("done", MessageMapper.to_dto(event["message"]))
+    except Exception:
+        # Headers are already sent, so failures are reported in-band
+        logger.exception("Error streaming answer")
+        yield format_event("error", {"detail": "Could not process the question. Please try again."})
+
+
+def answer_stream_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Stream answer events to the client as ``text/event-stream``.
+    
+    ``delta`` events carry answer text as it is generated; the final ``done``
+    event carries the saved message, whose content supersedes the deltas.
+    """
+    return StreamingResponse(
+        _answer_events(events),
+        media_type="text/event-stream",
+        # Disable proxy buffering (nginx) so tokens reach the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,42 @@
+"""Cross-encoder implementation of DocumentReranker port."""
+
+import logging
+import asyncio
+from typing import List
+
+import numpy as np
+
+from ...domain.entities import Document
+from ...domain.ports import DocumentReranker
+from ...infrastructure.similarity import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker(DocumentReranker):
+    """Rerank documents by scoring (question, document) pairs with a cross-encoder.
+    
+    Requires the optional sentence-transformers package.
+    """
+    
+    def __init__(self, model_name: str, batch_size: int = 32):
+        # Optional dependency; only needed when reranking is enabled
+        from sentence_transformers import CrossEncoder
+        
+        logger.info("Loading reranker model: %s", model_name)
+        self._model = CrossEncoder(model_name)
+        self._batch_size = batch_size
+    
+    async def rerank(self, question: str, documents: List[Document], top_k: int) -> List[Document]:
+        """Return the top_k documents most relevant to the question, best first."""
+        if len(documents) <= 1:
+            return documents[:top_k]
+        
+        pairs = [(question, document.content) for document in documents]
+        
+        # Model inference is CPU-bound; score all candidates as batches off the event loop
+        scores = await asyncio.to_thread(self._model.predict, pairs, batch_size=self._batch_size)
+        
+        # Only the kept candidates need ordering
+        order = top_k_indices(np.asarray(scores, dtype=np.float32), top_k)
+        return [documents[index] for index in order]
@@ -1,63 +1,193 @@
 """OpenAI service implementations."""
 
-from typing import List, Dict, Any
+import logging
+import asyncio
+from typing import AsyncIterator, Iterator, List, Dict, Any, Optional
 from openai import OpenAI
 
 from ...domain.ports import EmbeddingService, LLMService
+from ...infrastructure.batching import MicroBatcher
+from ...infrastructure.cache import EmbeddingCache, RedisEmbeddingCache
+from ...infrastructure.streaming import iterate_in_thread
+from ...infrastructure.tokens import recent_history
+
+logger = logging.getLogger(__name__)
+
+
+# System prompt for the single-pass RAG answer; built once so every request
+# sends a byte-identical prefix (eligible for OpenAI prompt caching)
+RAG_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": """You are 'Window to Truth', an academic researcher specialized in the Colombian conflict and the Truth Commission. Generate CONCRETE, SPECIFIC, and CONCISE responses based EXCLUSIVELY on the provided information. Follow these guidelines:
+
+1. DIRECT AND CONCRETE FORMAT:
+   - Start with a clear, direct answer to the question
+   - Present SPECIFIC data, numbers, and facts from the documents
+   - Use concrete examples and cases mentioned in the sources
+   - Include exact references to source documents with page numbers when available
+   - Keep responses BRIEF and focused while being informative
+
+2. EVIDENCE-BASED CONTENT:
+   - Prioritize specific statistics, figures, and documented facts
+   - Quote or paraphrase specific testimonies and findings (without victim names)
+   - Mention concrete policies, programs, or institutional actions documented
+   - Reference specific time periods, regions, or events when relevant
+   - Avoid generalizations - use the specific information from the documents
+
+3. ETHICAL STANDARDS:
+   - DO NOT reveal names of victims or specific locations that could endanger individuals
+   - Use precise, objective language with concrete details
+   - Base responses EXCLUSIVELY on provided information - no assumptions
+   - Maintain neutrality while presenting specific documented facts
+
+4. CONCISE STRUCTURE:
+   - Lead with the most important concrete information
+   - Support with 2-3 key specific data points or examples
+   - Include most relevant statistics when available
+   - End with a brief synthesis if necessary
+   - ALWAYS preserve complete reference citations
+
+Focus on delivering the most essential, actionable information in a concise format while maintaining all references."""
+}
 
 
 class OpenAIEmbeddingService(EmbeddingService):
     """OpenAI implementation of embedding service."""
     
-    def __init__(self, api_key: str, model: str = "text-embedding-3-large", expected_dimension: int = 3072):
-        self._client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "text-embedding-3-large",
+        expected_dimension: int = 3072,
+        cache: Optional[EmbeddingCache] = None,
+        shared_cache: Optional[RedisEmbeddingCache] = None,
+        client: Optional[OpenAI] = None,
+        batch_size: int = 32,
+        batch_wait_ms: float = 20.0
+    ):
+        self._client = client if client is not None else OpenAI(api_key=api_key)
         self._model = model
         self._expected_dimension = expected_dimension
-        print(f"Initialized embedding service with model: {model}, expected dimension: {expected_dimension}")
+        self._cache = cache if cache is not None else EmbeddingCache(max_size=0)
+        self._shared_cache = shared_cache
+        
+        # Coalesce embedding requests from concurrent questions into one API call
+        self._batcher: Optional[MicroBatcher[str, List[float]]] = None
+        if batch_size > 1:
+            self._batcher = MicroBatcher(
+                self._request_embeddings,
+                max_batch_size=batch_size,
+                max_wait_ms=batch_wait_ms,
+                name="embedding-batcher"
+            )
+        logger.info("Initialized embedding service with model: %s, expected dimension: %s", model, expected_dimension)
     
     async def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for the given text."""
-        if not text:
-            text = "Empty query"
+        embeddings = await self.generate_embeddings([text])
+        return embeddings[0]
+    
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts with a single API request."""
+        # Clean the texts
+        texts = [(text or "Empty query").replace("\n", " ").strip() for text in texts]
+        
+        # Embeddings are deterministic per model, so repeated questions can reuse them;
+        # texts differing only in case or spacing are embedded once
+        embeddings: List[Optional[List[float]]] = [self._cache.get(text) for text in texts]
+        keys = [self._cache.normalize(text) for text in texts]
+        missing_by_key: Dict[str, str] = {}
+        for key, text, emb in zip(keys, texts, embeddings):
+            if emb is None:
+                missing_by_key.setdefault(key, text)
+        
+        # Then the cache shared with the other workers, in one round trip
+        by_key: Dict[str, List[float]] = {}
+        if missing_by_key and self._shared_cache is not None:
+            shared = await asyncio.to_thread(self._shared_cache.get_many, list(missing_by_key.values()))
+            for (key, text), embedding in zip(list(missing_by_key.items()), shared):
+                if embedding is not None:
+                    self._cache.put(text, embedding)
+                    by_key[key] = embedding
+                    del missing_by_key[key]
         
-        # Clean the text
-        text = text.replace("\n", " ").strip()
+        missing = list(missing_by_key.values())
+        if missing:
+            if self._batcher is not None:
+                generated = await asyncio.gather(*(self._batcher.run(text) for text in missing))
+            else:
+                generated = await asyncio.to_thread(self._request_embeddings, missing)
+            for text, embedding in zip(missing, generated):
+                self._cache.put(text, embedding)
+            if self._shared_cache is not None:
+                await asyncio.to_thread(self._shared_cache.put_many, dict(zip(missing, generated)))
+            by_key.update(zip(missing_by_key, generated))
+        
+        if by_key:
+            embeddings = [emb if emb is not None else by_key[key] for key, emb in zip(keys, embeddings)]
         
+        return embeddings
+    
+    async def warm_up(self) -> None:
+        """Start the batching thread so the first question does not pay for it."""
+        if self._batcher is not None:
+            self._batcher.start()
+    
+    async def close(self) -> None:
+        """Stop the batching thread after the embeddings already queued are generated."""
+        if self._batcher is not None:
+            await asyncio.to_thread(self._batcher.stop)
+    
+    def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Call the embeddings endpoint once for all the given texts."""
         try:
-            print(f"Generating embedding with model: {self._model}")
+            logger.debug("Generating %s embedding(s) with model: %s", len(texts), self._model)
             
             # For text-embedding-3-* models, we can specify dimensions
             if "text-embedding-3" in self._model:
                 response = self._client.embeddings.create(
-                    input=text,
+                    input=texts,
                     model=self._model,
                     dimensions=self._expected_dimension  # Specify the dimension
                 )
             else:
                 response = self._client.embeddings.create(
-                    input=text,
+                    input=texts,
                     model=self._model
                 )
             
-            embedding = response.data[0].embedding
-            print(f"Embedding generated with dimension: {len(embedding)}")
+            # The API may return items out of order; `index` maps them back to the input
+            embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            logger.debug("Embedding generated with dimension: %s", len(embeddings[0]))
             
-            # Verify dimension matches expectation
-            if len(embedding) != self._expected_dimension:
-                print(f"WARNING: Generated embedding has {len(embedding)} dimensions, expected {self._expected_dimension}")
+            # Fail before a wrong-sized vector is cached; retrying would return the same size
+            if len(embeddings[0]) != self._expected_dimension:
+                raise ValueError(
+                    f"Embedding dimension mismatch: model {self._model} returned {len(embeddings[0])} "
+                    f"dimensions, expected {self._expected_dimension}"
+                )
             
-            return embedding
+            return embeddings
         except Exception as e:
-            print(f"Error generating embedding: {e}")
+            logger.error("Error generating embedding: %s", e)
             raise
 
 
 class OpenAILLMService(LLMService):
     """OpenAI implementation of LLM service."""
     
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
-        self._client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o-mini",
+        client: Optional[OpenAI] = None,
+        single_pass: bool = False,
+        max_history_tokens: int = 2000
+    ):
+        self._client = client if client is not None else OpenAI(api_key=api_key)
         self._model = model
+        self._single_pass = single_pass
+        self._max_history_tokens = max_history_tokens
     
     async def generate_answer(
         self, 
@@ -70,42 +200,12 @@ class OpenAILLMService(LLMService):
         prompt = self._build_prompt(question, context, chat_history)
         
         try:
-            response = self._client.chat.completions.create(
+            # The OpenAI client is synchronous; wait for it in a worker thread
+            response = await asyncio.to_thread(
+                self._client.chat.completions.create,
                 model=self._model,
                 messages=[
-                    {
-                        "role": "system", 
-                        "content": """You are 'Window to Truth', an academic researcher specialized in the Colombian conflict and the Truth Commission. Generate CONCRETE, SPECIFIC, and CONCISE responses based EXCLUSIVELY on the provided information. Follow these guidelines:
-
-1. DIRECT AND CONCRETE FORMAT:
-   - Start with a clear, direct answer to the question
-   - Present SPECIFIC data, numbers, and facts from the documents
-   - Use concrete examples and cases mentioned in the sources
-   - Include exact references to source documents with page numbers when available
-   - Keep responses BRIEF and focused while being informative
-
-2. EVIDENCE-BASED CONTENT:
-   - Prioritize specific statistics, figures, and documented facts
-   - Quote or paraphrase specific testimonies and findings (without victim names)
-   - Mention concrete policies, programs, or institutional actions documented
-   - Reference specific time periods, regions, or events when relevant
-   - Avoid generalizations - use the specific information from the documents
-
-3. ETHICAL STANDARDS:
-   - DO NOT reveal names of victims or specific locations that could endanger individuals
-   - Use precise, objective language with concrete details
-   - Base responses EXCLUSIVELY on provided information - no assumptions
-   - Maintain neutrality while presenting specific documented facts
-
-4. CONCISE STRUCTURE:
-   - Lead with the most important concrete information
-   - Support with 2-3 key specific data points or examples
-   - Include most relevant statistics when available
-   - End with a brief synthesis if necessary
-   - ALWAYS preserve complete reference citations
-
-Focus on delivering the most essential, actionable information in a concise format while maintaining all references."""
-                    },
+                    RAG_SYSTEM_MESSAGE,
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
@@ -115,9 +215,38 @@ Focus on delivering the most essential, actionable information in a concise form
             return response.choices[0].message.content
             
         except Exception as e:
-            print(f"Error generating answer: {e}")
+            logger.error("Error generating answer: %s", e)
             raise
     
+    async def stream_answer(
+        self, 
+        question: str, 
+        context: str, 
+        chat_history: List[Dict[str, Any]]
+    ) -> AsyncIterator[str]:
+        """Stream the answer to a question with the given context as it is generated."""
+        prompt = self._build_prompt(question, context, chat_history)
+        
+        def chunks() -> Iterator[str]:
+            # Leaving the block (also when the generator is closed) closes the
+            # HTTP response instead of draining it
+            with self._client.chat.completions.create(
+                model=self._model,
+                messages=[
+                    RAG_SYSTEM_MESSAGE,
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=500,
+                stream=True
+            ) as response:
+                for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        
+        async for text in iterate_in_thread(chunks):
+            yield text
+    
     async def generate_answer_with_tools(
         self, 
         question: str, 
@@ -125,10 +254,37 @@ Focus on delivering the most essential, actionable information in a concise form
     ) -> Dict[str, Any]:
         """Generate an answer using LLM with tool calling capabilities."""
         # Import here to avoid circular imports
-        from .openai_tools import generate_answer_with_tools
-        result = generate_answer_with_tools(question, chat_history, self._client)
+        from .openai_tools import generate_answer_with_tools, generate_answer_single_pass
         
-        # Ensure all required fields are present for compatibility
+        # Single-pass mode retrieves once up front instead of letting the model
+        # decide on (possibly multi-hop) searches
+        generate = generate_answer_single_pass if self._single_pass else generate_answer_with_tools
+        
+        # The tool loop makes several blocking OpenAI and Milvus calls; run it
+        # in a worker thread so the event loop keeps serving other requests
+        result = await asyncio.to_thread(generate, question, chat_history, self._client)
+        
+        return self._complete_result(result)
+    
+    async def stream_answer_with_tools(
+        self, 
+        question: str, 
+        chat_history: List[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an answer using LLM with tool calling capabilities."""
+        # Import here to avoid circular imports
+        from .openai_tools import stream_answer_with_tools, stream_answer_single_pass
+        
+        stream = stream_answer_single_pass if self._single_pass else stream_answer_with_tools
+        
+        async for event in iterate_in_thread(lambda: stream(question, chat_history, self._client)):
+            if event["type"] == "done":
+                event = {"type": "done", "result": self._complete_result(event["result"])}
+            yield event
+    
+    @staticmethod
+    def _complete_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Ensure all required fields are present for compatibility."""
         if "is_bot" not in result:
             result["is_bot"] = True
         if "references" not in result:
@@ -136,8 +292,6 @@ Focus on delivering the most essential, actionable information in a concise form
         if "contexts" not in result:
             result["contexts"] = []
         
-
-            
         return result
     
     def _build_prompt(self, question: str, context: str, chat_history: List[Dict[str, Any]]) -> str:
@@ -146,7 +300,7 @@ Focus on delivering the most essential, actionable information in a concise form
         conversation_context = ""
         if chat_history:
             conversation_context = "\n\nConversation history:\n"
-            for msg in chat_history[-5:]:  # Last 5 messages
+            for msg in recent_history(chat_history, self._max_history_tokens):
                 role = "Assistant" if msg["is_bot"] else "User"
                 conversation_context += f"{role}: {msg['content']}\n"
 
@@ -1,9 +1,22 @@
 """OpenAI tools implementation for RAG context retrieval."""
 
+import logging
 import json
-from typing import List, Dict, Any
+import re
+import concurrent.futures
+from typing import List, Dict, Any, Generator, Iterator, Optional, Tuple
 from openai import OpenAI
 
+from ...infrastructure.tokens import recent_history, trim_messages
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
 # Function definition for tool calling
 RAG_FUNCTION = {
     "name": "get_relevant_information",
@@ -20,123 +33,17 @@ RAG_FUNCTION = {
     }
 }
 
+# Tool list sent with every completion request, built once
+RAG_TOOLS = [{"type": "function", "function": RAG_FUNCTION}]
 
-def get_rag_context_for_tools(question: str) -> dict:
-    """
-    Gets relevant RAG context for a specific question for use with tools.
-    This function interfaces with the existing RAG infrastructure.
-    """
-    try:
-        # Import here to avoid circular dependencies
-        from ...infrastructure.dependencies import get_vector_database, get_embedding_service, get_context_builder
-        import asyncio
-        
-        async def _get_context():
-            vector_db = get_vector_database()
-            embedding_service = get_embedding_service()
-            context_builder = get_context_builder()
-            
-            print(f"Getting RAG context for question: {question}")
-            
-            # Generate embedding
-            embedding = await embedding_service.generate_embedding(question)
-            print(f"Generated embedding with dimension: {len(embedding)}")
-            
-            # Search documents
-            documents = await vector_db.search_similar_documents(embedding, limit=5)
-            print(f"Found {len(documents)} documents from vector search")
-            
-            if not documents:
-                print("WARNING: No documents found in vector search")
-                return {
-                    "context": "No se encontraron documentos relevantes en la base de datos para esta consulta.",
-                    "documents": []
-                }
-            
-            # Build context
-            rag_context = await context_builder.build_context(documents, question)
-            print(f"Built context with {len(rag_context.documents)} documents")
-            
-            # Build context with proper formatting
-            formatted_context_pieces = []
-            documents_metadata = []
-            
-            for doc in rag_context.documents:
-                # Extract metadata consistently
-                title = doc.metadata.get("title") or doc.original_fields.get("title") or "Untitled document"
-                url = doc.metadata.get("link") or doc.metadata.get("url") or ""
-                page = doc.metadata.get("page") or doc.original_fields.get("page") or ""
-                source_id = doc.metadata.get("source_id") or doc.original_fields.get("source_id") or ""
-                
-                # Format each piece consistently
-                formatted_piece = f"Source: {title}\n"
-                if url:
-                    formatted_piece += f"URL: {url}\n"
-                if page:
-                    formatted_piece += f"Page number: {page}\n"
-                formatted_piece += f"Text: {doc.content}"
-                
-                formatted_context_pieces.append(formatted_piece)
-                
-                # Store metadata for reference extraction
-                documents_metadata.append({
-                    "title": title,
-                    "page": page,
-                    "source_id": source_id,
-                    "metadata": doc.metadata,
-                    "original_fields": doc.original_fields,
-                    "score": doc.score
-                })
-            
-            # Join all context pieces with separators
-            formatted_context = "\n\n---\n\n".join(formatted_context_pieces)
-            
-            print(f"Final formatted context length: {len(formatted_context)} characters")
-            
-            return {
-                "context": formatted_context,
-                "documents": documents_metadata
-            }
-        
-        # Create new event loop for this thread if none exists
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                # If loop is already running, use asyncio.create_task
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, _get_context())
-                    return future.result()
-            else:
-                return loop.run_until_complete(_get_context())
-        except RuntimeError:
-            # No event loop in current thread, create new one
-            return asyncio.run(_get_context())
-        
-    except Exception as e:
-        print(f"Error getting RAG context for tools: {e}")
-        return {
-            "context": f"Could not retrieve relevant information due to: {str(e)}",
-            "documents": []
-        }
-
+# Tool response for a context the model already received earlier in the request
+DUPLICATE_CONTEXT_MESSAGE = "The information found for this question was already provided in a previous tool response."
 
-def generate_answer_with_tools(question: str, chat_history: List[Dict], client: OpenAI) -> Dict[str, Any]:
-    """
-    Generates a response using OpenAI with the ability to call tools for more context.
-    
-    Args:
-        question: User's question
-        chat_history: Conversation history
-        client: OpenAI client instance
-        
-    Returns:
-        Dict: Generated response and metadata
-    """
-    # System message with detailed academic guidelines
-    system_message = {
-        "role": "system", 
-        "content": """You are 'Window to Truth', an academic researcher specialized in the Colombian conflict and the Truth Commission. Generate responses based EXCLUSIVELY on the provided information following this EXACT format:
+# System message with detailed academic guidelines; built once so every request
+# sends a byte-identical prefix (eligible for OpenAI prompt caching)
+TOOLS_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": """You are 'Window to Truth', an academic researcher specialized in the Colombian conflict and the Truth Commission. Generate responses based EXCLUSIVELY on the provided information following this EXACT format:
 
 RESPONSE FORMAT:
 - Write in Spanish (unless specifically asked otherwise)
@@ -193,138 +100,484 @@ Sources
 CRITICAL: Every citation number [1], [2], [3] used in the text MUST have a corresponding entry in the Sources section.
 
 IMPORTANT: Use the get_relevant_information tool to find comprehensive information about the topic before responding."""
+}
+
+
+def _run_async(coro):
+    """Run a coroutine to completion from synchronous tool-calling code."""
+    import asyncio
+    
+    # Create new event loop for this thread if none exists
+    try:
+        loop = asyncio.get_event_loop()
+        if loop.is_running():
+            # If loop is already running, run the coroutine in a separate thread
+            with concurrent.futures.ThreadPoolExecutor() as executor:
+                future = executor.submit(asyncio.run, coro)
+                return future.result()
+        else:
+            return loop.run_until_complete(coro)
+    except RuntimeError:
+        # No event loop in current thread, create new one
+        return asyncio.run(coro)
+
+
+def get_embeddings_for_tools(questions: List[str]) -> List[List[float]]:
+    """Embed all the sub-questions of a tool-calling turn with a single request."""
+    # Import here to avoid circular dependencies
+    from ...infrastructure.dependencies import get_embedding_service
+    
+    return _run_async(get_embedding_service().generate_embeddings(questions))
+
+
+# Headers of a Sources section written by the model, replaced by our own
+_SOURCES_HEADER = "\n\nSources\n"
+_FUENTES_HEADER = "\n\nFuentes\n"
+_CITATION_PATTERN = re.compile(r'\[(\d+)\]')
+
+# Metadata keys that may hold a document's link, besides "link" and "url"
+_LINK_KEYS = frozenset(("link", "url", "enlace", "web", "website"))
+
+
+def _document_url(metadata: Dict[str, Any], original_fields: Dict[str, Any]) -> str:
+    """Return the document link stored in Milvus, or an empty string."""
+    url = (
+        metadata.get("link") or metadata.get("url")
+        or original_fields.get("link") or original_fields.get("url")
+    )
+    if not url:
+        # The link field may have been stored under another name
+        url = next((metadata[key] for key in metadata if key.lower() in _LINK_KEYS and metadata[key]), "")
+    return url
+
+
+def _format_rag_context(documents: List[Any]) -> dict:
+    """Format retrieved documents as tool context plus the metadata used for references."""
+    if not documents:
+        logger.warning("No documents found in vector search")
+        return {
+            "context": "No se encontraron documentos relevantes en la base de datos para esta consulta.",
+            "documents": []
+        }
+    
+    # Build the formatted context and the reference metadata in a single pass
+    formatted_context_pieces = []
+    documents_metadata = []
+    
+    for doc in documents:
+        # Extract metadata consistently
+        metadata = doc.metadata
+        original_fields = doc.original_fields or {}
+        title = metadata.get("title") or original_fields.get("title") or "Untitled document"
+        url = _document_url(metadata, original_fields)
+        page = metadata.get("page") or original_fields.get("page") or ""
+        source_id = metadata.get("source_id") or original_fields.get("source_id") or ""
+        
+        # Format each piece consistently
+        formatted_piece = [f"Source: {title}\n"]
+        if url:
+            formatted_piece.append(f"URL: {url}\n")
+        if page:
+            formatted_piece.append(f"Page number: {page}\n")
+        formatted_piece.append(f"Text: {doc.content}")
+        
+        formatted_context_pieces.append("".join(formatted_piece))
+        
+        # Store metadata for reference extraction
+        documents_metadata.append({
+            "title": title,
+            "page": page,
+            "source_id": source_id,
+            "link": url,
+            "metadata": metadata,
+            "original_fields": original_fields,
+            "score": doc.score
+        })
+    
+    # Join all context pieces with separators
+    formatted_context = "\n---\n".join(formatted_context_pieces)
+    
+    logger.debug("Final formatted context length: %s characters", len(formatted_context))
+    
+    return {
+        "context": formatted_context,
+        "documents": documents_metadata
     }
+
+
+def get_rag_contexts_for_tools(
+    questions: List[str],
+    embeddings: Optional[List[Optional[List[float]]]] = None
+) -> List[dict]:
+    """
+    Gets relevant RAG context for several questions for use with tools.
+    This function interfaces with the existing RAG infrastructure.
     
-    # Initialize messages
-    messages = [system_message]
+    All questions are searched with a single Milvus request. Embeddings that
+    were already computed (e.g. batched with the sub-questions of the same
+    turn) can be passed to skip re-embedding; None entries are embedded here.
+    """
+    if embeddings is None:
+        embeddings = [None] * len(questions)
     
-    # Add relevant chat history (last 5 messages)
-    relevant_history = chat_history[-5:] if len(chat_history) > 5 else chat_history
+    try:
+        # Import here to avoid circular dependencies
+        import asyncio
+        from ...infrastructure.config import config_service
+        from ...infrastructure.dependencies import get_vector_database, get_embedding_service, get_reranker
+        
+        async def _get_contexts():
+            vector_db = get_vector_database()
+            embedding_service = get_embedding_service()
+            
+            logger.debug("Getting RAG context for questions: %s", questions)
+            
+            # Generate the embeddings that were not provided
+            query_embeddings = list(embeddings)
+            missing = [index for index, embedding in enumerate(query_embeddings) if embedding is None]
+            if missing:
+                generated = await embedding_service.generate_embeddings([questions[index] for index in missing])
+                for index, embedding in zip(missing, generated):
+                    query_embeddings[index] = embedding
+            
+            # Search documents, reranking a larger candidate set when a reranker is configured
+            reranker = get_reranker()
+            if reranker is None:
+                document_lists = await vector_db.search_similar_documents_batch(query_embeddings, limit=5)
+            else:
+                candidate_lists = await vector_db.search_similar_documents_batch(
+                    query_embeddings, limit=max(5, config_service.rerank.candidates)
+                )
+                document_lists = await asyncio.gather(*(
+                    reranker.rerank(question, candidates, 5)
+                    for question, candidates in zip(questions, candidate_lists)
+                ))
+            
+            return [_format_rag_context(documents) for documents in document_lists]
+        
+        return _run_async(_get_contexts())
+        
+    except Exception as e:
+        logger.exception("Error getting RAG context for tools")
+        return [
+            {
+                "context": f"Could not retrieve relevant information due to: {str(e)}",
+                "documents": []
+            }
+            for _ in questions
+        ]
+
+
+def get_rag_context_for_tools(question: str, embedding: Optional[List[float]] = None) -> dict:
+    """Gets relevant RAG context for a single question for use with tools."""
+    return get_rag_contexts_for_tools([question], [embedding])[0]
+
+
+def _question_key(question: str) -> str:
+    """Normalise a sub-question so trivially different phrasings share one retrieval."""
+    return " ".join(question.lower().split())
+
+
+def _build_history_messages(chat_history: List[Dict]) -> List[Dict[str, Any]]:
+    """Start a message list with the system prompt and the recent chat history."""
+    messages = [TOOLS_SYSTEM_MESSAGE]
+    
+    # Import here to avoid circular dependencies
+    from ...infrastructure.config import config_service
+    
+    # Add as much recent chat history as fits in the history token budget
+    relevant_history = recent_history(chat_history, config_service.openai.max_history_tokens)
     for message in relevant_history:
         role = "assistant" if message["is_bot"] else "user"
         messages.append({"role": role, "content": message["content"]})
     
-    # Add current question
+    return messages
+
+
+def _stream_completion(client: OpenAI, **kwargs) -> Generator[Dict[str, Any], None, Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Stream a chat completion, yielding {"type": "delta"} events as content arrives.
+    
+    Returns the full content and the tool calls assembled from the stream, as
+    plain dicts in the shape the API accepts back in the message history.
+    """
+    content_parts = []
+    tool_calls: Dict[int, Dict[str, Any]] = {}
+    
+    # Leaving the block (also when the caller closes this generator) closes
+    # the HTTP response instead of draining it
+    with client.chat.completions.create(stream=True, **kwargs) as stream:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            
+            if delta.content:
+                content_parts.append(delta.content)
+                yield {"type": "delta", "content": delta.content}
+            
+            # Tool calls arrive in fragments keyed by their position in the list
+            for tool_call in delta.tool_calls or []:
+                entry = tool_calls.setdefault(tool_call.index, {
+                    "id": None,
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""}
+                })
+                if tool_call.id:
+                    entry["id"] = tool_call.id
+                if tool_call.function:
+                    if tool_call.function.name:
+                        entry["function"]["name"] += tool_call.function.name
+                    if tool_call.function.arguments:
+                        entry["function"]["arguments"] += tool_call.function.arguments
+    
+    return "".join(content_parts), [tool_calls[index] for index in sorted(tool_calls)]
+
+
+def _final_result(events: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """Consume an answer event stream and return its final result."""
+    for event in events:
+        if event["type"] == "done":
+            return event["result"]
+    raise RuntimeError("Answer stream ended without a result")
+
+
+def _done(content: str, collected_contexts: List[Dict]) -> Dict[str, Any]:
+    """Build the final event of an answer stream, adding the Sources section."""
+    formatted_response, filtered_references = _format_response_with_sources(content, collected_contexts)
+    return {
+        "type": "done",
+        "result": {
+            "content": formatted_response,
+            "is_bot": True,
+            "contexts": collected_contexts,
+            "references": filtered_references
+        }
+    }
+
+
+def _error(message: str, collected_contexts: List[Dict]) -> Dict[str, Any]:
+    """Build the final event of an answer stream that failed."""
+    return {
+        "type": "done",
+        "result": {
+            "content": message,
+            "is_bot": True,
+            "error": True,
+            "contexts": collected_contexts
+        }
+    }
+
+
+def generate_answer_with_tools(question: str, chat_history: List[Dict], client: OpenAI) -> Dict[str, Any]:
+    """
+    Generates a response using OpenAI with the ability to call tools for more context.
+    
+    Args:
+        question: User's question
+        chat_history: Conversation history
+        client: OpenAI client instance
+        
+    Returns:
+        Dict: Generated response and metadata
+    """
+    return _final_result(stream_answer_with_tools(question, chat_history, client))
+
+
+def stream_answer_with_tools(question: str, chat_history: List[Dict], client: OpenAI) -> Iterator[Dict[str, Any]]:
+    """
+    Generates a response like generate_answer_with_tools, streaming the answer text.
+    
+    Yields {"type": "delta", "content": str} events as answer tokens arrive and
+    ends with one {"type": "done", "result": dict} event carrying the formatted
+    response (with its Sources section) and metadata.
+    """
+    # Initialize messages
+    messages = _build_history_messages(chat_history)
+    
+    # Add current question; it and the tool-call frame that follows are never trimmed
     messages.append({"role": "user", "content": question})
+    question_index = len(messages) - 1
+    
+    # Import here to avoid circular dependencies
+    from ...infrastructure.config import config_service
+    max_prompt_tokens = config_service.openai.max_prompt_tokens
     
     # List to collect all contextual information obtained
     collected_contexts = []
     
+    # Retrieval results by normalised sub-question, and the contexts already sent
+    retrieved: Dict[str, Dict[str, Any]] = {}
+    seen_contexts = set()
+    
     # Conversation loop with tools (max 3 turns to avoid loops)
     max_turns = 3
     
     for turn in range(max_turns):
         try:
-            # Call OpenAI API with tools
-            response = client.chat.completions.create(
+            # Call OpenAI API with tools, forwarding answer tokens as they arrive
+            content, tool_calls = yield from _stream_completion(
+                client,
                 model="gpt-4o-mini",
-                messages=messages,
-                tools=[{
-                    "type": "function",
-                    "function": RAG_FUNCTION
-                }],
+                messages=trim_messages(messages, question_index, max_prompt_tokens),
+                tools=RAG_TOOLS,
                 tool_choice="auto",
                 temperature=0.3
             )
             
-            # Get the response message
-            response_message = response.choices[0].message
+            # If there are no tool calls, return the final response
+            if not tool_calls:
+                yield _done(content, collected_contexts)
+                return
             
             # Add the message to history
             messages.append({
                 "role": "assistant",
-                "content": response_message.content,
-                "tool_calls": response_message.tool_calls
+                "content": content or None,
+                "tool_calls": tool_calls
             })
             
-            # Check if there are tool calls
-            tool_calls = response_message.tool_calls
-            
-            # If there are no tool calls, return the final response
-            if not tool_calls:
-                # Format the response with sources section
-                formatted_response, filtered_references = _format_response_with_sources(
-                    response_message.content, 
-                    collected_contexts
-                )
-                return {
-                    "content": formatted_response,
-                    "is_bot": True,
-                    "contexts": collected_contexts,
-                    "references": filtered_references
-                }
-            
-            # Process each tool call
+            # Collect the sub-questions of every tool call in this turn
+            rag_calls = []
             for tool_call in tool_calls:
-                if tool_call.function.name == "get_relevant_information":
+                if tool_call["function"]["name"] == "get_relevant_information":
                     # Extract arguments
-                    func_args = json.loads(tool_call.function.arguments)
+                    func_args = _json_loads(tool_call["function"]["arguments"])
                     subquestion = func_args.get("question")
                     
                     if not subquestion:
                         continue
                     
-                    print(f"Tool called for turn {turn + 1} with question: {subquestion}")
-                    
-                    # Get RAG context for the sub-question
-                    rag_result = get_rag_context_for_tools(subquestion)
-                    context = rag_result["context"]
-                    documents = rag_result["documents"]
+                    logger.debug("Tool called for turn %s with question: %s", turn + 1, subquestion)
+                    rag_calls.append((tool_call, subquestion))
+            
+            # Sub-questions repeated across turns (the model often asks the same
+            # thing again) reuse the context already retrieved for them
+            to_fetch = {}
+            for _, subquestion in rag_calls:
+                key = _question_key(subquestion)
+                if key not in retrieved and key not in to_fetch:
+                    to_fetch[key] = subquestion
+            subquestions = list(to_fetch.values())
+            
+            # Embed all new sub-questions with a single request
+            embeddings = []
+            if subquestions:
+                try:
+                    embeddings = get_embeddings_for_tools(subquestions)
+                except Exception as e:
+                    logger.warning("Batch embedding failed, embedding sub-questions individually: %s", e)
+                    embeddings = [None] * len(subquestions)
+            
+            # Retrieve the context of every sub-question with one vector search
+            rag_results = get_rag_contexts_for_tools(subquestions, embeddings) if subquestions else []
+            retrieved.update(zip(to_fetch, rag_results))
+            
+            # Process each tool call
+            for tool_call, subquestion in rag_calls:
+                rag_result = retrieved[_question_key(subquestion)]
+                context = rag_result["context"]
+                
+                if context in seen_contexts:
+                    # Don't resend (or store) a context the model has already seen
+                    context = DUPLICATE_CONTEXT_MESSAGE
+                else:
+                    seen_contexts.add(context)
                     
                     # Store collected context with documents for reference extraction
                     collected_contexts.append({
                         "question": subquestion,
                         "context": context,
-                        "documents": documents
-                    })
-                    
-                    # Add the tool response
-                    messages.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": "get_relevant_information",
-                        "content": context
+                        "documents": rag_result["documents"]
                     })
+                
+                # Add the tool response
+                messages.append({
+                    "tool_call_id": tool_call["id"],
+                    "role": "tool",
+                    "name": "get_relevant_information",
+                    "content": context
+                })
         
         except Exception as e:
-            print(f"Error in OpenAI API call on turn {turn + 1}: {e}")
-            return {
-                "content": f"An error occurred while processing your question: {str(e)}",
-                "is_bot": True,
-                "error": True,
-                "contexts": collected_contexts
-            }
+            logger.exception("Error in OpenAI API call on turn %s", turn + 1)
+            yield _error(f"An error occurred while processing your question: {str(e)}", collected_contexts)
+            return
     
     # If we reach the turn limit, generate final response with all collected context
     try:
-        final_response = client.chat.completions.create(
+        content, _ = yield from _stream_completion(
+            client,
             model="gpt-4o-mini",
-            messages=messages,
+            messages=trim_messages(messages, question_index, max_prompt_tokens),
             temperature=0.3,
             max_tokens=800
         )
+        yield _done(content, collected_contexts)
+    
+    except Exception as e:
+        logger.exception("Error in final response")
+        yield _error(f"An error occurred while generating the final response: {str(e)}", collected_contexts)
+
+
+def generate_answer_single_pass(question: str, chat_history: List[Dict], client: OpenAI) -> Dict[str, Any]:
+    """
+    Generates a response with one retrieval for the question and one completion.
+    
+    Unlike generate_answer_with_tools, the model cannot issue follow-up searches,
+    which saves the completion that only decides which tool calls to make.
+    
+    Args:
+        question: User's question
+        chat_history: Conversation history
+        client: OpenAI client instance
         
-        # Format the final response with sources section
-        formatted_final_response, filtered_references = _format_response_with_sources(
-            final_response.choices[0].message.content, 
-            collected_contexts
+    Returns:
+        Dict: Generated response and metadata
+    """
+    return _final_result(stream_answer_single_pass(question, chat_history, client))
+
+
+def stream_answer_single_pass(question: str, chat_history: List[Dict], client: OpenAI) -> Iterator[Dict[str, Any]]:
+    """
+    Generates a response like generate_answer_single_pass, streaming the answer text.
+    
+    Yields the same events as stream_answer_with_tools.
+    """
+    rag_result = get_rag_context_for_tools(question)
+    collected_contexts = [{
+        "question": question,
+        "context": rag_result["context"],
+        "documents": rag_result["documents"]
+    }]
+    
+    messages = _build_history_messages(chat_history)
+    
+    # Retrieved sources and the current question are never trimmed
+    context_index = len(messages)
+    messages.append({
+        "role": "system",
+        "content": f"Relevant information retrieved for the question (use it instead of calling tools):\n\n{rag_result['context']}"
+    })
+    messages.append({"role": "user", "content": question})
+    
+    # Import here to avoid circular dependencies
+    from ...infrastructure.config import config_service
+    max_prompt_tokens = config_service.openai.max_prompt_tokens
+    
+    try:
+        content, _ = yield from _stream_completion(
+            client,
+            model="gpt-4o-mini",
+            messages=trim_messages(messages, context_index, max_prompt_tokens),
+            temperature=0.3,
+            max_tokens=800
         )
-        
-        return {
-            "content": formatted_final_response,
-            "is_bot": True,
-            "contexts": collected_contexts,
-            "references": filtered_references
-        }
+        yield _done(content, collected_contexts)
     
     except Exception as e:
-        print(f"Error in final response: {e}")
-        return {
-            "content": f"An error occurred while generating the final response: {str(e)}",
-            "is_bot": True,
-            "error": True,
-            "contexts": collected_contexts
-        }
+        logger.exception("Error in single-pass response")
+        yield _error(f"An error occurred while generating the response: {str(e)}", collected_contexts)
 
 
 def _format_response_with_sources(content: str, collected_contexts: List[Dict]) -> tuple[str, List[Dict]]:
@@ -338,28 +591,21 @@ def _format_response_with_sources(content: str, collected_contexts: List[Dict])
     if not references:
         return content, []
     
-    # If content already has a Sources section, remove it to replace with our enhanced version
-    import re
-    
-    # Check if there's already a Sources section and remove it
-    sources_pattern = r'\n\nSources\n.*$'
-    if "Sources" in content:
-        print("DEBUG: Found existing Sources section, will replace it with URLs")
-        content = re.sub(sources_pattern, '', content, flags=re.DOTALL)
-    elif "Fuentes" in content:
-        print("DEBUG: Found existing Fuentes section, will replace it with URLs")
-        fuentes_pattern = r'\n\nFuentes\n.*$'
-        content = re.sub(fuentes_pattern, '', content, flags=re.DOTALL)
+    # If content already has a Sources section, cut it off to replace it with our
+    # version; partition splits at the first header in one pass
+    content, header, _ = content.partition(_SOURCES_HEADER)
+    if header:
+        logger.debug("Found existing Sources section, will replace it with URLs")
+    else:
+        content, header, _ = content.partition(_FUENTES_HEADER)
+        if header:
+            logger.debug("Found existing Fuentes section, will replace it with URLs")
     
     # Find all citation numbers in the content to ensure we have all referenced sources
-    import re
-    cited_numbers = set()
-    citation_matches = re.findall(r'\[(\d+)\]', content)
-    for match in citation_matches:
-        cited_numbers.add(int(match))
+    cited_numbers = {int(match) for match in _CITATION_PATTERN.findall(content)}
     
     # Build sources section with all cited references
-    sources_section = "\n\nSources"
+    sources_section = ["\n\nSources"]
     
     # If we have cited numbers, use them to determine how many sources to include
     if cited_numbers:
@@ -376,20 +622,19 @@ def _format_response_with_sources(content: str, collected_contexts: List[Dict])
     for i in range(max_sources):
         if i < len(references):
             ref = references[i]
-            source_line = f"\n{i+1}. {ref['title']}. ({ref['year']}). {ref['publisher']}."
+            sources_section.append(f"\n{i+1}. {ref['title']}. ({ref['year']}). {ref['publisher']}.")
             if ref.get('isbn'):
-                source_line += f" ISBN {ref['isbn']}."
+                sources_section.append(f" ISBN {ref['isbn']}.")
             if ref.get('page'):
-                source_line += f", Page {ref['page']}."
+                sources_section.append(f", Page {ref['page']}.")
             # Incluir la URL con texto descriptivo si existe en los datos de Milvus
             if ref.get('url'):
-                print(f"DEBUG: Reference {i+1} has URL: {ref['url']}")
-                source_line += f" [Ver documento]({ref['url']})"
+                logger.debug("Reference %s has URL: %s", i+1, ref['url'])
+                sources_section.append(f" [Ver documento]({ref['url']})")
             else:
-                print(f"DEBUG: Reference {i+1} has no URL. Full ref: {ref}")
-            sources_section += source_line
+                logger.debug("Reference %s has no URL. Full ref: %s", i+1, ref)
     
-    return content + sources_section, filtered_references
+    return content + "".join(sources_section), filtered_references
 
 
 def _extract_references_from_contexts(collected_contexts: List[Dict]) -> List[Dict]:
@@ -411,41 +656,9 @@ def _extract_references_from_contexts(collected_contexts: List[Dict]) -> List[Di
                 continue
             seen_references.add(unique_id)
             
-            # Get URL specifically from the "link" field in Milvus
-            url = None
-            print(f"DEBUG: Full document structure: {doc}")
-            
-            # First check if there's a direct link field
-            if "link" in doc:
-                url = doc["link"]
-                print(f"DEBUG: Direct link field found: {url}")
-            
-            # Check metadata
-            if not url and "metadata" in doc:
-                metadata = doc["metadata"]
-                print(f"DEBUG: Metadata keys: {list(metadata.keys()) if metadata else 'No metadata'}")
-                if metadata:
-                    url = metadata.get("link") or metadata.get("url")
-                    print(f"DEBUG: From metadata - URL: {url}")
-            
-            # Check original_fields
-            if not url and "original_fields" in doc:
-                original_fields = doc["original_fields"]
-                print(f"DEBUG: Original fields keys: {list(original_fields.keys()) if original_fields else 'No original_fields'}")
-                if original_fields:
-                    url = original_fields.get("link") or original_fields.get("url")
-                    print(f"DEBUG: From original_fields - URL: {url}")
-            
-            # Si aún no se encuentra URL, comprobar si el campo 'link' existe con otro nombre
-            if not url and "metadata" in doc and doc["metadata"]:
-                # Verificar todos los campos que puedan contener enlaces
-                for key in doc["metadata"]:
-                    if key.lower() in ["link", "url", "enlace", "web", "website"]:
-                        url = doc["metadata"][key]
-                        print(f"DEBUG: Found URL in metadata key '{key}': {url}")
-                        break
-            
-            print(f"DEBUG: Final URL for reference {ref_number}: {url}")
+            # The link was resolved with the rest of the metadata when the context was built
+            url = doc.get("link") or None
+            logger.debug("Final URL for reference %s: %s", ref_number, url)
             
             # No agregar URLs predeterminadas - usar solo la URL que viene de Milvus
             
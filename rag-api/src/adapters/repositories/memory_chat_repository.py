@@ -1,6 +1,8 @@
 """In-memory implementation of ChatSessionRepository."""
 
-from typing import Dict, List, Optional
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 from uuid import UUID
 
 from ...domain.entities import ChatSession
@@ -8,28 +10,63 @@ from ...domain.ports import ChatSessionRepository
 
 
 class InMemoryChatSessionRepository(ChatSessionRepository):
-    """In-memory implementation of chat session repository."""
+    """In-memory implementation of chat session repository.
     
-    def __init__(self):
-        self._chats: Dict[UUID, ChatSession] = {}
+    Memory is bounded: the least recently used chats are evicted beyond
+    ``max_chats``, chats not saved for ``ttl_seconds`` expire, and only the
+    last ``max_messages`` messages of a chat are kept (0 disables a limit).
+    """
+    
+    def __init__(self, max_chats: int = 10000, ttl_seconds: int = 86400, max_messages: int = 0):
+        self._max_chats = max_chats
+        self._ttl = ttl_seconds
+        self._max_messages = max_messages
+        # Chat ID -> (monotonic time of the last save, chat), least recently used first
+        self._chats: "OrderedDict[UUID, Tuple[float, ChatSession]]" = OrderedDict()
+    
+    def _expired(self, saved_at: float) -> bool:
+        return self._ttl > 0 and time.monotonic() - saved_at > self._ttl
+    
+    def _live_chats(self) -> List[ChatSession]:
+        """Return the chats that have not expired, dropping the expired ones."""
+        expired = [chat_id for chat_id, (saved_at, _) in self._chats.items() if self._expired(saved_at)]
+        for chat_id in expired:
+            del self._chats[chat_id]
+        return [chat for _, chat in self._chats.values()]
     
     async def save(self, chat_session: ChatSession) -> ChatSession:
         """Save a chat session."""
-        self._chats[chat_session.id] = chat_session
+        if self._max_messages > 0 and len(chat_session.messages) > self._max_messages:
+            chat_session.messages = chat_session.messages[-self._max_messages:]
+        
+        self._chats[chat_session.id] = (time.monotonic(), chat_session)
+        self._chats.move_to_end(chat_session.id)
+        if self._max_chats > 0:
+            while len(self._chats) > self._max_chats:
+                self._chats.popitem(last=False)
         return chat_session
     
     async def find_by_id(self, chat_id: UUID) -> Optional[ChatSession]:
         """Find a chat session by ID."""
-        return self._chats.get(chat_id)
+        entry = self._chats.get(chat_id)
+        if entry is None:
+            return None
+        
+        saved_at, chat = entry
+        if self._expired(saved_at):
+            del self._chats[chat_id]
+            return None
+        self._chats.move_to_end(chat_id)
+        return chat
     
     async def find_all(self) -> List[ChatSession]:
         """Find all chat sessions."""
-        return list(self._chats.values())
+        return self._live_chats()
     
     async def find_by_session_id(self, session_id: str) -> List[ChatSession]:
         """Find all chat sessions for a specific session ID."""
         return [
-            chat for chat in self._chats.values() 
+            chat for chat in self._live_chats() 
             if chat.session_id == session_id
         ]
     
@@ -1,10 +1,19 @@
 """Milvus implementation of VectorDatabase port."""
 
-from typing import List, Optional
-from pymilvus import connections, Collection, utility, db
+import logging
+import asyncio
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from pymilvus import connections, Collection, LoadState, utility, db
 
 from ...domain.entities import Document
 from ...domain.ports import VectorDatabase
+from ...infrastructure.batching import MicroBatcher
+from ...infrastructure.cache import SemanticSearchCache
+from ...infrastructure.similarity import cosine_similarities, mmr_select, top_k_similar
+
+logger = logging.getLogger(__name__)
 
 
 class MilvusVectorDatabase(VectorDatabase):
@@ -16,15 +25,50 @@ class MilvusVectorDatabase(VectorDatabase):
         port: str, 
         database: str, 
         collection_name: str,
-        alternative_names: List[str]
+        alternative_names: Sequence[str],
+        search_ef: int = 64,
+        rerank_factor: int = 1,
+        mmr_lambda: float = 1.0,
+        cache: Optional[SemanticSearchCache] = None,
+        expected_dimension: int = 3072,
+        batch_size: int = 16,
+        batch_wait_ms: float = 20.0,
+        batch_concurrency: int = 4
     ):
         self._host = host
         self._port = port
         self._database = database
         self._collection_name = collection_name
-        self._alternative_names = alternative_names
+        # Lookup order, without repeats (the configured name is usually also an alternative)
+        self._candidates: Tuple[str, ...] = tuple(dict.fromkeys((collection_name, *alternative_names)))
+        self._search_ef = search_ef
+        self._rerank_factor = max(rerank_factor, 1)
+        self._mmr_lambda = mmr_lambda
+        self._cache = cache if cache is not None else SemanticSearchCache(max_size=0)
         self._collection: Optional[Collection] = None
-        self._initialize_connection()
+        self._output_fields: List[str] = []
+        # Configured until the collection schema is read, then the collection's own dimension
+        self._expected_dimension = expected_dimension
+        self._loaded = False
+        self._lock = threading.Lock()
+        
+        # Coalesce searches from concurrent questions into one multi-vector request;
+        # several batches may be in flight so Milvus I/O is not serialised
+        self._batcher: Optional[MicroBatcher[Tuple[List[float], int], List[Document]]] = None
+        if batch_size > 1:
+            self._batcher = MicroBatcher(
+                self._search_batch,
+                max_batch_size=batch_size,
+                max_wait_ms=batch_wait_ms,
+                name="search-batcher",
+                max_concurrency=batch_concurrency
+            )
+        
+        try:
+            self._initialize_connection()
+        except Exception as e:
+            # Don't take the worker down if Milvus is briefly unavailable; retry on first search
+            logger.warning("Milvus not available at startup, deferring connection to first search: %s", e)
     
     def _initialize_connection(self):
         """Initialize connection to Milvus."""
@@ -34,34 +78,32 @@ class MilvusVectorDatabase(VectorDatabase):
                 host=self._host,
                 port=self._port
             )
-            print(f"Successfully connected to Milvus at {self._host}:{self._port}")
+            logger.info("Successfully connected to Milvus at %s:%s", self._host, self._port)
             
             # Try to select the database
             try:
                 db.using_database(self._database)
-                print(f"Database {self._database} selected")
+                logger.info("Database %s selected", self._database)
             except Exception as e:
-                print(f"Note: Could not select database {self._database}: {e}")
-                print("This is normal in older versions of Milvus")
+                logger.info("Could not select database %s (normal in older versions of Milvus): %s", self._database, e)
             
             self._collection = self._get_collection()
             
         except Exception as e:
-            print(f"Error connecting to Milvus: {e}")
+            logger.error("Error connecting to Milvus: %s", e)
             raise
     
     def _get_collection(self) -> Collection:
         """Get the collection instance."""
-        # List available collections
+        # List available collections once; candidates are matched against it locally
         collections = utility.list_collections()
-        print(f"Available collections: {collections}")
+        logger.info("Available collections: %s", collections)
+        available = set(collections)
         
         # Try different collection name formats
-        candidates = [self._collection_name] + self._alternative_names
-        
-        for candidate in candidates:
-            if candidate in collections:
-                print(f"Found collection: {candidate}")
+        for candidate in self._candidates:
+            if candidate in available:
+                logger.info("Found collection: %s", candidate)
                 collection = Collection(name=candidate)
                 
                 # Get schema information to verify embedding dimension
@@ -70,87 +112,194 @@ class MilvusVectorDatabase(VectorDatabase):
                 
                 if embedding_field:
                     expected_dim = embedding_field.dim
-                    print(f"Collection {candidate} expects embedding dimension: {expected_dim}")
+                    logger.info("Collection %s expects embedding dimension: %s", candidate, expected_dim)
                     
-                    # Store the expected dimension for later use
+                    # Resolved once per collection lookup; searches only compare lengths
                     self._expected_dimension = expected_dim
                 
                 # Verify the collection has data
                 entity_count = collection.num_entities
-                print(f"Collection {candidate} has {entity_count} entities")
+                logger.info("Collection %s has %s entities", candidate, entity_count)
                 
                 if entity_count > 0:
+                    # The schema does not change at runtime, so resolve the search output fields once
+                    self._output_fields = [field.name for field in schema.fields if field.name != "embedding"]
+                    # Results cached from a previously resolved collection no longer apply
+                    self._cache.clear()
                     return collection
         
-        raise ValueError(f"No valid collection found among: {candidates}")
+        raise ValueError(f"No valid collection found among: {list(self._candidates)}")
+    
+    def _ensure_collection_loaded(self) -> Collection:
+        """Connect if needed and make sure the collection is loaded, checking Milvus only once."""
+        if self._collection is not None and self._loaded:
+            return self._collection
+        
+        with self._lock:
+            if self._collection is None:
+                self._initialize_connection()
+            
+            if not self._loaded:
+                # Another worker (or a previous run) has usually loaded it already
+                if utility.load_state(self._collection.name) != LoadState.Loaded:
+                    logger.info("Loading collection %s into memory", self._collection.name)
+                    self._collection.load()
+                self._loaded = True
+        
+        return self._collection
+    
+    def reset_collection(self) -> None:
+        """Forget the resolved collection so the next search looks it up and loads it again.
+        
+        Needed when the collection is rebuilt or released behind a running API.
+        """
+        with self._lock:
+            self._collection = None
+            self._loaded = False
+        self._cache.clear()
     
     @property
     def expected_dimension(self) -> int:
         """Get the expected embedding dimension for this collection."""
-        return getattr(self, '_expected_dimension', 1536)
+        return self._expected_dimension
     
     async def search_similar_documents(self, embedding: List[float], limit: int = 5) -> List[Document]:
         """Search for similar documents using vector similarity."""
-        if not self._collection:
-            raise ValueError("Collection not initialized")
+        results = await self.search_similar_documents_batch([embedding], limit)
+        return results[0]
+    
+    async def search_similar_documents_batch(
+        self, embeddings: List[List[float]], limit: int = 5
+    ) -> List[List[Document]]:
+        """Search for the documents similar to each embedding with a single Milvus request."""
+        # pymilvus is blocking; keep its calls off the event loop
+        if self._collection is None or not self._loaded:
+            await asyncio.to_thread(self._ensure_collection_loaded)
+        
+        # Validate embedding dimension against the one cached from the schema
+        for embedding in embeddings:
+            if len(embedding) != self._expected_dimension:
+                raise ValueError(
+                    f"Embedding dimension mismatch: collection expects {self._expected_dimension} dimensions "
+                    f"but received {len(embedding)} dimensions. Please check your embedding model configuration."
+                )
         
-        # Validate embedding dimension
-        expected_dim = self.expected_dimension
-        actual_dim = len(embedding)
+        # Paraphrased questions often land on the same neighbourhood
+        results: List[Optional[List[Document]]] = [self._cache.get(embedding, limit) for embedding in embeddings]
+        missing = [index for index, documents in enumerate(results) if documents is None]
+        if len(missing) < len(embeddings):
+            logger.debug("Search cache hit for %s of %s queries", len(embeddings) - len(missing), len(embeddings))
         
-        if actual_dim != expected_dim:
-            raise ValueError(
-                f"Embedding dimension mismatch: collection expects {expected_dim} dimensions "
-                f"but received {actual_dim} dimensions. Please check your embedding model configuration."
-            )
+        if missing:
+            if self._batcher is not None:
+                searched = await asyncio.gather(*(self._batcher.run((embeddings[index], limit)) for index in missing))
+            else:
+                searched = await asyncio.to_thread(self._search, [embeddings[index] for index in missing], limit)
+            for index, documents in zip(missing, searched):
+                self._cache.put(embeddings[index], limit, documents)
+                results[index] = documents
+        
+        return results
+    
+    def _search_batch(self, queries: List[Tuple[List[float], int]]) -> List[List[Document]]:
+        """Search a batch of (embedding, limit) queries with one Milvus request per distinct limit."""
+        by_limit: Dict[int, List[int]] = {}
+        for index, (_, limit) in enumerate(queries):
+            by_limit.setdefault(limit, []).append(index)
+        
+        results: List[List[Document]] = [[] for _ in queries]
+        for limit, indices in by_limit.items():
+            searched = self._search([queries[index][0] for index in indices], limit)
+            for index, documents in zip(indices, searched):
+                results[index] = documents
+        return results
+    
+    def _search(self, embeddings: List[List[float]], limit: int) -> List[List[Document]]:
+        """Run one vector search for all embeddings and build documents from the hits; blocks on Milvus."""
+        collection = self._ensure_collection_loaded()
         
         try:
-            # Load collection if not already loaded
-            self._collection.load()
+            output_fields = self._output_fields
             
-            # Get schema to determine output fields
-            schema = self._collection.schema
-            output_fields = [field.name for field in schema.fields if field.name != "embedding"]
+            # Over-fetch candidates with their vectors so they can be rescored exactly
+            rerank = self._rerank_factor > 1
+            candidate_limit = limit * self._rerank_factor if rerank else limit
+            if rerank:
+                output_fields = output_fields + ["embedding"]
             
-            print(f"DEBUG: Available schema fields: {[field.name for field in schema.fields]}")
-            print(f"DEBUG: Output fields for search: {output_fields}")
-            print(f"Searching with embedding dimension: {len(embedding)}")
+            logger.debug("Output fields for search: %s", output_fields)
+            logger.debug("Searching %s queries with embedding dimension: %s", len(embeddings), len(embeddings[0]))
             
-            # Perform the search
-            search_results = self._collection.search(
-                data=[embedding],
+            # The collection uses an HNSW index; ef must be at least the number of results
+            search_params = {"metric_type": "COSINE", "params": {"ef": max(self._search_ef, candidate_limit)}}
+            
+            # Perform the search; Milvus returns one list of hits per query vector
+            search_results = collection.search(
+                data=embeddings,
                 anns_field="embedding",
-                param={"metric_type": "COSINE", "params": {"nprobe": 10}},
-                limit=limit,
+                param=search_params,
+                limit=candidate_limit,
                 output_fields=output_fields
             )
             
-            documents = []
-            for hit in search_results[0]:
-                print(f"DEBUG: Hit object: {hit}")
-                print(f"DEBUG: Hit entity: {hit.entity}")
-                doc_dict = hit.entity.to_dict()
-                print(f"DEBUG: Hit entity.to_dict(): {doc_dict}")
+            results = []
+            for embedding, query_hits in zip(embeddings, search_results):
+                hits = [(hit.entity, hit.score) for hit in query_hits]
+                if rerank:
+                    hits = self._rerank(embedding, hits, limit)
                 
-                # Extract content and metadata
-                content = self._extract_content(doc_dict)
-                metadata = self._extract_metadata(doc_dict)
+                documents = []
+                for entity, score in hits:
+                    logger.debug("Hit entity: %s", entity)
+                    doc_dict = entity.to_dict()
+                    doc_dict.pop("embedding", None)
+                    logger.debug("Hit entity.to_dict(): %s", doc_dict)
+                    
+                    # Extract content and metadata
+                    content = self._extract_content(doc_dict)
+                    metadata = self._extract_metadata(doc_dict)
+                    
+                    document = Document(
+                        content=content,
+                        metadata=metadata,
+                        score=score,
+                        original_fields=doc_dict
+                    )
+                    documents.append(document)
                 
-                document = Document(
-                    content=content,
-                    metadata=metadata,
-                    score=hit.score,
-                    original_fields=doc_dict
-                )
-                documents.append(document)
+                logger.debug("Found %s similar documents", len(documents))
+                results.append(documents)
             
-            print(f"Found {len(documents)} similar documents")
-            return documents
+            return results
             
         except Exception as e:
-            print(f"Error searching documents: {e}")
+            logger.error("Error searching documents: %s", e)
+            # The handle may be stale (collection dropped, rebuilt or released);
+            # resolve it again on the next search instead of failing forever
+            self.reset_collection()
             raise
     
+    def _rerank(self, embedding: List[float], hits: List[Tuple], limit: int) -> List[Tuple]:
+        """Keep the ``limit`` candidates with the highest exact cosine similarity.
+        
+        With an MMR lambda below 1 candidates are instead picked by maximal
+        marginal relevance, so near-duplicate passages are not all returned.
+        """
+        if not hits:
+            return hits
+        
+        vectors = np.array([entity.get("embedding") for entity, _ in hits], dtype=np.float32)
+        query = np.asarray(embedding, dtype=np.float32)
+        if self._mmr_lambda >= 1.0:
+            indices, scores = top_k_similar(vectors, query, limit, normalized=False)
+            return [(hits[index][0], float(score)) for index, score in zip(indices, scores)]
+        
+        scores = cosine_similarities(vectors, query)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+        indices = mmr_select(scores, vectors, limit, self._mmr_lambda)
+        return [(hits[index][0], float(scores[index])) for index in indices]
+    
     def _extract_content(self, doc_dict: dict) -> str:
         """Extract content from document dictionary."""
         # Try different content field names
@@ -178,22 +327,34 @@ class MilvusVectorDatabase(VectorDatabase):
                 metadata[field] = doc_dict[field]
         
         # Log for debugging
-        print(f"DEBUG: doc_dict keys: {list(doc_dict.keys())}")
-        print(f"DEBUG: doc_dict content: {doc_dict}")
-        
-        if "link" in doc_dict:
-            print(f"Found link field: {doc_dict['link']}")
-        else:
-            print(f"No link field found. Available fields: {list(doc_dict.keys())}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("doc_dict keys: %s", list(doc_dict.keys()))
+            logger.debug("doc_dict content: %s", doc_dict)
+            
+            if "link" in doc_dict:
+                logger.debug("Found link field: %s", doc_dict['link'])
+            else:
+                logger.debug("No link field found. Available fields: %s", list(doc_dict.keys()))
         
         return metadata
     
+    async def warm_up(self) -> None:
+        """Connect, resolve and load the collection ahead of the first search."""
+        if self._batcher is not None:
+            self._batcher.start()
+        await asyncio.to_thread(self._ensure_collection_loaded)
+    
+    async def close(self) -> None:
+        """Stop the batching thread after the searches already queued are run."""
+        if self._batcher is not None:
+            await asyncio.to_thread(self._batcher.stop)
+    
     async def verify_connection(self) -> bool:
         """Verify database connection."""
         try:
             conn_status = connections.get_connection_addr("default")
-            print(f"Milvus connection status: {conn_status}")
+            logger.debug("Milvus connection status: %s", conn_status)
             return True
         except Exception as e:
-            print(f"Error verifying connection: {e}")
+            logger.error("Error verifying connection: %s", e)
             return False
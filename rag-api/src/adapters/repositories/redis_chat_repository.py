@@ -0,0 +1,149 @@
+"""Redis implementation of ChatSessionRepository."""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+from uuid import UUID
+
+from ...domain.entities import ChatSession, Message
+from ...domain.ports import ChatSessionRepository
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    _loads = json.loads
+
+
+class RedisChatSessionRepository(ChatSessionRepository):
+    """Redis implementation of chat session repository.
+    
+    Each chat is one JSON document under ``chat:<id>``, so every worker
+    process sees the same chats. A sorted set ordered by ``updated_at`` and
+    one set per session ID index them for listing; entries whose chat has
+    expired are dropped from the indexes when next listed.
+    
+    Like the other repositories, ``save`` writes the whole chat: two turns
+    processed concurrently in the same chat keep the last one saved.
+    """
+    
+    def __init__(self, client: Any, ttl_seconds: int = 0, prefix: str = "chat:"):
+        self._client = client
+        # 0 keeps chats until deleted
+        self._ttl = ttl_seconds or None
+        self._prefix = prefix
+        self._all_key = f"{prefix}all"
+        self._session_prefix = f"{prefix}session:"
+    
+    def _chat_key(self, chat_id: Any) -> str:
+        return f"{self._prefix}{chat_id}"
+    
+    @staticmethod
+    def _to_document(chat_session: ChatSession) -> bytes:
+        return _dumps({
+            "id": str(chat_session.id),
+            "title": chat_session.title,
+            "session_id": chat_session.session_id,
+            "created_at": chat_session.created_at.isoformat(),
+            "updated_at": chat_session.updated_at.isoformat(),
+            "messages": [
+                {
+                    "content": message.content,
+                    "is_bot": message.is_bot,
+                    "timestamp": message.timestamp.isoformat() if message.timestamp else None,
+                    "references": message.references
+                }
+                for message in chat_session.messages
+            ]
+        })
+    
+    @staticmethod
+    def _from_document(document: bytes) -> ChatSession:
+        data = _loads(document)
+        return ChatSession(
+            id=UUID(data["id"]),
+            title=data["title"],
+            session_id=data.get("session_id"),
+            messages=[
+                Message(
+                    content=message["content"],
+                    is_bot=message["is_bot"],
+                    timestamp=datetime.fromisoformat(message["timestamp"]) if message.get("timestamp") else None,
+                    references=message.get("references")
+                )
+                for message in data["messages"]
+            ],
+            created_at=datetime.fromisoformat(data["created_at"]),
+            updated_at=datetime.fromisoformat(data["updated_at"])
+        )
+    
+    async def save(self, chat_session: ChatSession) -> ChatSession:
+        """Save a chat session."""
+        def _save_sync():
+            chat_id = str(chat_session.id)
+            # One MULTI/EXEC so the document and its index entries change together
+            pipeline = self._client.pipeline(transaction=True)
+            pipeline.set(self._chat_key(chat_id), self._to_document(chat_session), ex=self._ttl)
+            pipeline.zadd(self._all_key, {chat_id: chat_session.updated_at.timestamp()})
+            if chat_session.session_id:
+                pipeline.sadd(self._session_prefix + chat_session.session_id, chat_id)
+            pipeline.execute()
+        
+        await asyncio.to_thread(_save_sync)
+        return chat_session
+    
+    async def find_by_id(self, chat_id: UUID) -> Optional[ChatSession]:
+        """Find a chat session by ID."""
+        document = await asyncio.to_thread(self._client.get, self._chat_key(chat_id))
+        return self._from_document(document) if document else None
+    
+    def _load_chats(self, chat_ids: List[Any], index_key: str) -> List[ChatSession]:
+        """Fetch chats with one MGET, dropping index entries of expired chats."""
+        if not chat_ids:
+            return []
+        
+        chat_ids = [chat_id.decode() if isinstance(chat_id, bytes) else chat_id for chat_id in chat_ids]
+        documents = self._client.mget([self._chat_key(chat_id) for chat_id in chat_ids])
+        expired = [chat_id for chat_id, document in zip(chat_ids, documents) if not document]
+        if expired:
+            if index_key == self._all_key:
+                self._client.zrem(index_key, *expired)
+            else:
+                self._client.srem(index_key, *expired)
+        return [self._from_document(document) for document in documents if document]
+    
+    async def find_all(self) -> List[ChatSession]:
+        """Find all chat sessions, most recently updated first."""
+        def _find_all_sync():
+            return self._load_chats(self._client.zrevrange(self._all_key, 0, -1), self._all_key)
+        
+        return await asyncio.to_thread(_find_all_sync)
+    
+    async def find_by_session_id(self, session_id: str) -> List[ChatSession]:
+        """Find all chat sessions for a specific session ID, most recently updated first."""
+        def _find_by_session_sync():
+            session_key = self._session_prefix + session_id
+            chats = self._load_chats(list(self._client.smembers(session_key)), session_key)
+            return sorted(chats, key=lambda chat: chat.updated_at, reverse=True)
+        
+        return await asyncio.to_thread(_find_by_session_sync)
+    
+    async def delete(self, chat_id: UUID) -> bool:
+        """Delete a chat session."""
+        def _delete_sync():
+            document = self._client.get(self._chat_key(chat_id))
+            pipeline = self._client.pipeline(transaction=True)
+            pipeline.delete(self._chat_key(chat_id))
+            pipeline.zrem(self._all_key, str(chat_id))
+            if document:
+                session_id = _loads(document).get("session_id")
+                if session_id:
+                    pipeline.srem(self._session_prefix + session_id, str(chat_id))
+            deleted = pipeline.execute()[0]
+            return deleted > 0
+        
+        return await asyncio.to_thread(_delete_sync)
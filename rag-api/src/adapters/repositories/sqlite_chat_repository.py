@@ -1,5 +1,6 @@
 """SQLite implementation of ChatSessionRepository."""
 
+import logging
 import sqlite3
 import json
 import asyncio
@@ -11,9 +12,38 @@ from pathlib import Path
 from ...domain.entities import ChatSession, Message
 from ...domain.ports import ChatSessionRepository
 
+try:
+    import orjson
+    
+    def _dump_json(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    
+    def _dump_references(references: Any) -> str:
+        return orjson.dumps(references).decode("utf-8")
+    
+    _load_json = orjson.loads
+except ImportError:
+    def _dump_json(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    
+    def _dump_references(references: Any) -> str:
+        return json.dumps(references, ensure_ascii=False)
+    
+    _load_json = json.loads
+
+logger = logging.getLogger(__name__)
+
 
 class SQLiteChatSessionRepository(ChatSessionRepository):
-    """SQLite implementation of chat session repository."""
+    """SQLite implementation of chat session repository.
+    
+    The database runs in WAL mode so several worker processes can share it:
+    readers never block the writer, and writers wait up to BUSY_TIMEOUT
+    seconds for each other instead of failing with "database is locked".
+    """
+    
+    # Seconds a connection waits for another worker's write lock
+    BUSY_TIMEOUT = 30.0
     
     def __init__(self, db_path: str = "chat_sessions.db"):
         """Initialize the SQLite repository.
@@ -22,18 +52,29 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
             db_path: Path to the SQLite database file
         """
         self.db_path = db_path
+        self._fts_enabled = False
         self._ensure_database_exists()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection configured for concurrent use by several workers."""
+        conn = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT)
+        # Pragmas are per connection; without this ON DELETE CASCADE is ignored
+        conn.execute("PRAGMA foreign_keys = ON")
+        # In WAL mode a full sync is only needed at checkpoints
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+    
     def _ensure_database_exists(self):
         """Create the database and tables if they don't exist."""
         try:
-            print(f"Creating SQLite database at: {self.db_path}")
+            logger.info("Creating SQLite database at: %s", self.db_path)
             
             # Ensure parent directory exists
             Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
             
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("PRAGMA foreign_keys = ON")
+            with self._connect() as conn:
+                # Persistent for the database file; lets readers and a writer work concurrently
+                conn.execute("PRAGMA journal_mode = WAL")
                 
                 # Create chat_sessions table
                 conn.execute('''
@@ -85,10 +126,66 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
                 
                 conn.commit()
                 
+                self._fts_enabled = self._ensure_fts_index(conn)
+        
         except Exception as e:
-            print(f"Error creating database: {e}")
+            logger.error("Error creating database: %s", e)
             raise
     
+    def _ensure_fts_index(self, conn: sqlite3.Connection) -> bool:
+        """Create the FTS5 index over message content, if SQLite supports it.
+        
+        The index is an external-content table kept in sync by triggers, so
+        message text is not stored twice. Returns whether it is available.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+        ).fetchone() is not None
+        
+        try:
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts
+                USING fts5(content, content='messages', content_rowid='id')
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning("FTS5 not available, message search will scan content: %s", e)
+            return False
+        
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+            END
+        ''')
+        
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END
+        ''')
+        
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+            END
+        ''')
+        
+        if not exists:
+            # Index messages stored before the FTS table existed
+            conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+        
+        conn.commit()
+        return True
+    
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Turn free text into an FTS5 query matching messages that contain every word.
+        
+        Words are quoted so FTS5 syntax in the input is taken literally, and
+        matched as prefixes to stay close to the previous substring search.
+        """
+        return " ".join('"' + term.replace('"', '""') + '"*' for term in query.split())
+    
     def _chat_session_from_row(self, row: sqlite3.Row, messages: List[Message] = None) -> ChatSession:
         """Convert a database row to a ChatSession entity."""
         return ChatSession(
@@ -105,7 +202,7 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
         references = None
         if row['message_references']:
             try:
-                references = json.loads(row['message_references'])
+                references = _load_json(row['message_references'])
             except (json.JSONDecodeError, TypeError):
                 references = None
         
@@ -117,42 +214,62 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
         )
     
     async def save(self, chat_session: ChatSession) -> ChatSession:
-        """Save a chat session with all its messages."""
+        """Save a chat session with all its messages.
+        
+        Messages are append-only, so only those not yet stored are inserted.
+        The stored history is compared with the session's under the write
+        lock: if another worker appended messages after this session was
+        loaded, they are kept and this session's new messages go after them.
+        """
         def _save_sync():
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
+                chat_id = str(chat_session.id)
+                
+                # Take the write lock before reading, so concurrent saves of one chat are serialised
+                conn.execute('BEGIN IMMEDIATE')
                 
-                # Save or update chat session
+                # Save or update chat session (upsert keeps the row, unlike REPLACE)
                 conn.execute('''
-                    INSERT OR REPLACE INTO chat_sessions 
+                    INSERT INTO chat_sessions 
                     (id, title, session_id, created_at, updated_at)
                     VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        title = excluded.title,
+                        session_id = excluded.session_id,
+                        updated_at = excluded.updated_at
                 ''', (
-                    str(chat_session.id),
+                    chat_id,
                     chat_session.title,
                     chat_session.session_id,
                     chat_session.created_at.isoformat(),
                     chat_session.updated_at.isoformat()
                 ))
                 
-                # Delete existing messages for this chat
-                conn.execute('DELETE FROM messages WHERE chat_id = ?', (str(chat_session.id),))
-                
-                # Save all messages
-                for i, message in enumerate(chat_session.messages):
+                stored = conn.execute(
+                    'SELECT content, is_bot FROM messages WHERE chat_id = ? ORDER BY message_order', 
+                    (chat_id,)
+                ).fetchall()
+                
+                # The session's messages past the history both share are the new ones
+                common = 0
+                for row, message in zip(stored, chat_session.messages):
+                    if row['content'] != message.content or bool(row['is_bot']) != message.is_bot:
+                        break
+                    common += 1
+                
+                # Save only the new messages, after everything already stored
+                rows = []
+                for i, message in enumerate(chat_session.messages[common:], start=len(stored)):
                     references_json = None
                     if message.references:
                         try:
-                            references_json = json.dumps(message.references)
+                            references_json = _dump_references(message.references)
                         except (TypeError, ValueError):
                             references_json = None
                     
-                    conn.execute('''
-                        INSERT INTO messages 
-                        (chat_id, content, is_bot, timestamp, message_references, message_order)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        str(chat_session.id),
+                    rows.append((
+                        chat_id,
                         message.content,
                         message.is_bot,
                         message.timestamp.isoformat() if message.timestamp else datetime.now().isoformat(),
@@ -160,6 +277,12 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
                         i
                     ))
                 
+                conn.executemany('''
+                    INSERT INTO messages 
+                    (chat_id, content, is_bot, timestamp, message_references, message_order)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+                
                 conn.commit()
         
         # Run in thread to avoid blocking
@@ -169,7 +292,7 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
     async def find_by_id(self, chat_id: UUID) -> Optional[ChatSession]:
         """Find a chat session by ID with all its messages."""
         def _find_sync():
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 
                 # Get chat session
@@ -198,7 +321,7 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
     async def find_all(self) -> List[ChatSession]:
         """Find all chat sessions (without messages for performance)."""
         def _find_all_sync():
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 
                 cursor = conn.execute('''
@@ -213,7 +336,7 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
     async def find_by_session_id(self, session_id: str) -> List[ChatSession]:
         """Find all chat sessions for a specific session ID."""
         def _find_by_session_sync():
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 
                 cursor = conn.execute('''
@@ -229,7 +352,7 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
     async def delete(self, chat_id: UUID) -> bool:
         """Delete a chat session and all its messages."""
         def _delete_sync():
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute(
                     'DELETE FROM chat_sessions WHERE id = ?', 
                     (str(chat_id),)
@@ -242,7 +365,7 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
     async def get_chat_statistics(self) -> Dict[str, Any]:
         """Get comprehensive statistics about stored chats."""
         def _get_stats_sync():
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 
                 # Total chats and messages
@@ -300,17 +423,30 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
     async def search_messages(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search messages by content."""
         def _search_sync():
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 
-                cursor = conn.execute('''
-                    SELECT m.*, cs.title as chat_title, cs.session_id
-                    FROM messages m
-                    JOIN chat_sessions cs ON m.chat_id = cs.id
-                    WHERE m.content LIKE ?
-                    ORDER BY m.timestamp DESC
-                    LIMIT ?
-                ''', (f'%{query}%', limit))
+                fts_query = self._fts_query(query) if self._fts_enabled else ""
+                if fts_query:
+                    # Look candidates up in the inverted index instead of scanning every message
+                    cursor = conn.execute('''
+                        SELECT m.*, cs.title as chat_title, cs.session_id
+                        FROM messages_fts
+                        JOIN messages m ON m.id = messages_fts.rowid
+                        JOIN chat_sessions cs ON m.chat_id = cs.id
+                        WHERE messages_fts MATCH ?
+                        ORDER BY m.timestamp DESC
+                        LIMIT ?
+                    ''', (fts_query, limit))
+                else:
+                    cursor = conn.execute('''
+                        SELECT m.*, cs.title as chat_title, cs.session_id
+                        FROM messages m
+                        JOIN chat_sessions cs ON m.chat_id = cs.id
+                        WHERE m.content LIKE ?
+                        ORDER BY m.timestamp DESC
+                        LIMIT ?
+                    ''', (f'%{query}%', limit))
                 
                 results = []
                 for row in cursor.fetchall():
@@ -322,7 +458,7 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
                         'content': row['content'],
                         'is_bot': bool(row['is_bot']),
                         'timestamp': row['timestamp'],
-                        'references': json.loads(row['message_references']) if row['message_references'] else None
+                        'references': _load_json(row['message_references']) if row['message_references'] else None
                     })
                 
                 return results
@@ -332,7 +468,7 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
     async def export_chat_data(self, chat_id: Optional[UUID] = None) -> Dict[str, Any]:
         """Export chat data for backup or analysis."""
         def _export_sync():
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.row_factory = sqlite3.Row
                 
                 if chat_id:
@@ -350,12 +486,16 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
                     messages_cursor = conn.execute('SELECT * FROM messages ORDER BY chat_id, message_order')
                     messages = messages_cursor.fetchall()
                 
+                # Group messages by chat in one pass
+                messages_by_chat: Dict[str, List[Dict[str, Any]]] = {}
+                for msg in messages:
+                    messages_by_chat.setdefault(msg['chat_id'], []).append(dict(msg))
+                
                 # Convert to dictionaries
                 chats_data = []
                 for chat in chats:
                     chat_dict = dict(chat)
-                    chat_messages = [dict(msg) for msg in messages if msg['chat_id'] == chat['id']]
-                    chat_dict['messages'] = chat_messages
+                    chat_dict['messages'] = messages_by_chat.get(chat['id'], [])
                     chats_data.append(chat_dict)
                 
                 return {
@@ -368,10 +508,57 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
         
         return await asyncio.get_event_loop().run_in_executor(None, _export_sync)
     
+    async def export_chat_data_to_file(self, output_path: str, chat_id: Optional[UUID] = None) -> Dict[str, Any]:
+        """Write the export_chat_data document to a JSON file, one chat at a time.
+        
+        Only one chat and its messages are held in memory at once. Returns the
+        export summary (the document without its chats).
+        """
+        def _export_sync():
+            summary = {
+                'export_timestamp': datetime.now().isoformat(),
+                'chat_id': str(chat_id) if chat_id else None,
+                'total_chats': 0,
+                'total_messages': 0
+            }
+            
+            with self._connect() as conn, open(output_path, 'wb') as f:
+                conn.row_factory = sqlite3.Row
+                
+                if chat_id:
+                    chat_cursor = conn.execute('SELECT * FROM chat_sessions WHERE id = ?', (str(chat_id),))
+                else:
+                    chat_cursor = conn.execute('SELECT * FROM chat_sessions ORDER BY created_at')
+                
+                f.write(b'{\n  "export_timestamp": ' + _dump_json(summary['export_timestamp']))
+                f.write(b',\n  "chat_id": ' + _dump_json(summary['chat_id']))
+                f.write(b',\n  "chats": [')
+                
+                for chat in chat_cursor:
+                    chat_dict = dict(chat)
+                    chat_dict['messages'] = [
+                        dict(msg) for msg in conn.execute(
+                            'SELECT * FROM messages WHERE chat_id = ? ORDER BY message_order', (chat['id'],)
+                        )
+                    ]
+                    
+                    f.write(b'\n' if summary['total_chats'] == 0 else b',\n')
+                    f.write(_dump_json(chat_dict))
+                    summary['total_chats'] += 1
+                    summary['total_messages'] += len(chat_dict['messages'])
+                
+                # Totals are only known once every chat has been written
+                f.write(b'\n  ],\n  "total_chats": ' + _dump_json(summary['total_chats']))
+                f.write(b',\n  "total_messages": ' + _dump_json(summary['total_messages']) + b'\n}\n')
+            
+            return summary
+        
+        return await asyncio.get_event_loop().run_in_executor(None, _export_sync)
+    
     async def cleanup_old_chats(self, days_old: int = 30) -> int:
         """Delete chats older than specified days."""
         def _cleanup_sync():
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.execute('''
                     DELETE FROM chat_sessions 
                     WHERE datetime(updated_at) < datetime('now', '-{} days')
@@ -380,3 +567,21 @@ class SQLiteChatSessionRepository(ChatSessionRepository):
                 return cursor.rowcount
         
         return await asyncio.get_event_loop().run_in_executor(None, _cleanup_sync)
+    
+    async def backup(self, backup_path: str) -> None:
+        """Copy the database to backup_path with SQLite's online backup API.
+        
+        Unlike a file copy, this takes a consistent snapshot even while other
+        connections are writing.
+        """
+        def _backup_sync():
+            source = self._connect()
+            destination = sqlite3.connect(backup_path)
+            try:
+                # Copy in steps so writers are not locked out for the whole backup
+                source.backup(destination, pages=1024)
+            finally:
+                destination.close()
+                source.close()
+        
+        await asyncio.get_event_loop().run_in_executor(None, _backup_sync)
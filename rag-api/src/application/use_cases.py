@@ -1,12 +1,16 @@
 """Use cases for the RAG API application."""
 
-from typing import List, Optional
+import logging
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 from datetime import datetime
 
-from ..domain.entities import ChatSession, Message, Question, ChatResponse
+from ..domain.entities import ChatSession, Document, Message, Question, ChatResponse
 from ..domain.ports import (
+    AnswerCache,
     ChatSessionRepository, 
+    DocumentReranker,
     VectorDatabase, 
     EmbeddingService, 
     LLMService, 
@@ -14,6 +18,8 @@ from ..domain.ports import (
     TimestampService
 )
 
+logger = logging.getLogger(__name__)
+
 
 class ChatSessionUseCase:
     """Use case for managing chat sessions."""
@@ -29,7 +35,7 @@ class ChatSessionUseCase:
     async def create_chat_session(self, title: str, session_id: Optional[str] = None) -> ChatSession:
         """Create a new chat session."""
         chat_id = uuid4()
-        current_time = datetime.fromisoformat(self._timestamp_service.get_current_timestamp())
+        current_time = self._timestamp_service.get_current_datetime()
         
         chat_session = ChatSession(
             id=chat_id,
@@ -60,6 +66,9 @@ class ChatSessionUseCase:
 class QuestionAnsweringUseCase:
     """Use case for processing questions and generating answers."""
     
+    # Number of most recent messages passed to the LLM as chat history
+    HISTORY_MESSAGES = 10
+    
     def __init__(
         self,
         chat_repository: ChatSessionRepository,
@@ -67,7 +76,10 @@ class QuestionAnsweringUseCase:
         embedding_service: EmbeddingService,
         llm_service: LLMService,
         context_builder: RAGContextBuilder,
-        timestamp_service: TimestampService
+        timestamp_service: TimestampService,
+        answer_cache: Optional[AnswerCache] = None,
+        reranker: Optional[DocumentReranker] = None,
+        rerank_candidates: int = 20
     ):
         self._chat_repository = chat_repository
         self._vector_db = vector_db
@@ -75,14 +87,49 @@ class QuestionAnsweringUseCase:
         self._llm_service = llm_service
         self._context_builder = context_builder
         self._timestamp_service = timestamp_service
+        self._answer_cache = answer_cache
+        self._reranker = reranker
+        self._rerank_candidates = rerank_candidates
     
-    async def process_question(
-        self, 
-        question: Question, 
-        use_tools: bool = True,
-        top_k: int = 5
-    ) -> Message:
-        """Process a question and generate an answer."""
+    async def _search_documents(self, question_text: str, embedding: List[float], top_k: int) -> List[Document]:
+        """Retrieve the top_k documents, reranking a larger candidate set when a reranker is set."""
+        if self._reranker is None:
+            return await self._vector_db.search_similar_documents(embedding, top_k)
+        
+        candidates = await self._vector_db.search_similar_documents(
+            embedding, max(top_k, self._rerank_candidates)
+        )
+        return await self._reranker.rerank(question_text, candidates, top_k)
+    
+    async def _search_documents_batch(
+        self, question_texts: List[str], embeddings: List[List[float]], top_k: int
+    ) -> List[List[Document]]:
+        """Retrieve the top_k documents for several questions with one vector search."""
+        if self._reranker is None:
+            return await self._vector_db.search_similar_documents_batch(embeddings, top_k)
+        
+        candidate_lists = await self._vector_db.search_similar_documents_batch(
+            embeddings, max(top_k, self._rerank_candidates)
+        )
+        return list(await asyncio.gather(*(
+            self._reranker.rerank(text, candidates, top_k)
+            for text, candidates in zip(question_texts, candidate_lists)
+        )))
+    
+    @classmethod
+    def _chat_history(cls, chat_session: ChatSession) -> List[Dict[str, Any]]:
+        """Return the most recent messages of a chat in the form sent to the LLM.
+        
+        The negative slice copies only the last HISTORY_MESSAGES entries, so
+        the cost does not grow with the length of the chat.
+        """
+        return [
+            {"content": msg.content, "is_bot": msg.is_bot}
+            for msg in chat_session.messages[-cls.HISTORY_MESSAGES:]
+        ]
+    
+    async def _start_turn(self, question: Question) -> Tuple[ChatSession, bool, datetime, List[Dict[str, Any]]]:
+        """Append the user's question to its chat and build the history for the LLM."""
         # Get the chat session
         chat_session = await self._chat_repository.find_by_id(question.chat_id)
         if not chat_session:
@@ -92,7 +139,7 @@ class QuestionAnsweringUseCase:
         is_first_message = len(chat_session.messages) == 0
         
         # Add user message to chat
-        current_time = datetime.fromisoformat(self._timestamp_service.get_current_timestamp())
+        current_time = self._timestamp_service.get_current_datetime()
         user_message = Message(
             content=question.text,
             is_bot=False,
@@ -100,24 +147,81 @@ class QuestionAnsweringUseCase:
         )
         chat_session.messages.append(user_message)
         
-        # Update chat title with the first question if it's a generic title
-        if is_first_message and (chat_session.title == "Nuevo Chat" or chat_session.title == "New conversation"):
+        if is_first_message:
+            self._set_title_from_question(chat_session, question.text)
+        
+        # Prepare chat history
+        chat_history = self._chat_history(chat_session)
+        
+        return chat_session, is_first_message, current_time, chat_history
+    
+    @staticmethod
+    def _set_title_from_question(chat_session: ChatSession, question_text: str) -> None:
+        """Update chat title with the first question if it's a generic title."""
+        if chat_session.title == "Nuevo Chat" or chat_session.title == "New conversation":
             # Truncate question if too long for title
-            new_title = question.text[:50] + "..." if len(question.text) > 50 else question.text
+            new_title = question_text[:50] + "..." if len(question_text) > 50 else question_text
             chat_session.title = new_title
+    
+    async def _lookup_answer(
+        self, question: Question, is_first_message: bool
+    ) -> Tuple[Optional[List[float]], Optional[Dict[str, Any]]]:
+        """Return the question's embedding and a cached answer, when one may be reused."""
+        # A standalone question's answer does not depend on chat history,
+        # so a near-identical earlier question can be answered from cache
+        if not is_first_message or self._answer_cache is None:
+            return None, None
+        
+        question_embedding = await self._embedding_service.generate_embedding(question.text)
+        return question_embedding, self._answer_cache.get(question_embedding)
+    
+    def _remember_answer(self, question_embedding: Optional[List[float]], tool_response: Dict[str, Any]) -> None:
+        """Cache a generated answer for later near-identical questions."""
+        if question_embedding is not None and not tool_response.get("error"):
+            self._answer_cache.put(question_embedding, {
+                "content": tool_response["content"],
+                "references": tool_response.get("references", [])
+            })
+    
+    async def _save_error(self, chat_session: ChatSession, current_time: datetime, error: Exception) -> Exception:
+        """Record a failed answer in the chat and return the error to raise."""
+        error_message = f"Error processing question: {str(error)}"
+        logger.error(error_message, exc_info=error)
+        
+        # Create error response
+        error_response = Message(
+            content="I apologize, but I couldn't process your question. Please try again.",
+            is_bot=True,
+            timestamp=current_time
+        )
+        
+        chat_session.messages.append(error_response)
+        await self._chat_repository.save(chat_session)
+        
+        return Exception(error_message)
+    
+    async def process_question(
+        self, 
+        question: Question, 
+        use_tools: bool = True,
+        top_k: int = 5
+    ) -> Message:
+        """Process a question and generate an answer."""
+        chat_session, is_first_message, current_time, chat_history = await self._start_turn(question)
         
         try:
-            # Prepare chat history
-            chat_history = [
-                {"content": msg.content, "is_bot": msg.is_bot}
-                for msg in chat_session.messages[-10:]  # Last 10 messages
-            ]
-            
             if use_tools:
-                # Use tool-based approach
-                tool_response = await self._llm_service.generate_answer_with_tools(
-                    question.text, chat_history
-                )
+                question_embedding, cached_answer = await self._lookup_answer(question, is_first_message)
+                
+                if cached_answer is not None:
+                    logger.debug("Answer cache hit, skipping retrieval and generation")
+                    tool_response = cached_answer
+                else:
+                    # Use tool-based approach
+                    tool_response = await self._llm_service.generate_answer_with_tools(
+                        question.text, chat_history
+                    )
+                    self._remember_answer(question_embedding, tool_response)
                 
                 # Create response message
                 bot_message = Message(
@@ -132,7 +236,7 @@ class QuestionAnsweringUseCase:
                 embedding = await self._embedding_service.generate_embedding(question.text)
                 
                 # Search for similar documents
-                documents = await self._vector_db.search_similar_documents(embedding, top_k)
+                documents = await self._search_documents(question.text, embedding, top_k)
                 
                 # Build context
                 rag_context = await self._context_builder.build_context(documents, question.text)
@@ -163,17 +267,155 @@ class QuestionAnsweringUseCase:
             
         except Exception as e:
             # Handle errors gracefully
-            error_message = f"Error processing question: {str(e)}"
-            print(error_message)
+            raise await self._save_error(chat_session, current_time, e)
+    
+    async def process_questions(self, chat_id: UUID, question_texts: List[str], top_k: int = 5) -> List[Message]:
+        """Answer several questions of one chat together, embedding them with a single request.
+        
+        Each question is answered with the retrieval-augmented flow (no tool
+        calling) against the chat history from before the batch. Questions and
+        answers are appended to the chat in order and saved once.
+        """
+        chat_session = await self._chat_repository.find_by_id(chat_id)
+        if not chat_session:
+            raise ValueError(f"Chat session {chat_id} not found")
+        
+        if not question_texts:
+            return []
+        
+        if not chat_session.messages:
+            self._set_title_from_question(chat_session, question_texts[0])
+        
+        current_time = self._timestamp_service.get_current_datetime()
+        chat_history = self._chat_history(chat_session)
+        user_messages = [
+            Message(content=text, is_bot=False, timestamp=current_time)
+            for text in question_texts
+        ]
+        
+        try:
+            # One embeddings request for the whole batch
+            embeddings = await self._embedding_service.generate_embeddings(question_texts)
+            
+            document_lists = await self._search_documents_batch(question_texts, embeddings, top_k)
+            rag_contexts = await asyncio.gather(*(
+                self._context_builder.build_context(documents, text)
+                for text, documents in zip(question_texts, document_lists)
+            ))
+            answers = await asyncio.gather(*(
+                self._llm_service.generate_answer(text, rag_context.context_text, chat_history)
+                for text, rag_context in zip(question_texts, rag_contexts)
+            ))
+        except Exception as e:
+            chat_session.messages.extend(user_messages)
+            raise await self._save_error(chat_session, current_time, e)
+        
+        bot_messages = []
+        for user_message, answer, rag_context in zip(user_messages, answers, rag_contexts):
+            bot_message = Message(
+                content=answer,
+                is_bot=True,
+                timestamp=current_time,
+                references=[ref.__dict__ for ref in rag_context.references]
+            )
+            chat_session.messages.append(user_message)
+            chat_session.messages.append(bot_message)
+            bot_messages.append(bot_message)
+        
+        chat_session.updated_at = current_time
+        await self._chat_repository.save(chat_session)
+        
+        return bot_messages
+    
+    async def stream_question(
+        self, 
+        question: Question, 
+        use_tools: bool = True,
+        top_k: int = 5
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Process a question, streaming the answer as it is generated.
+        
+        The chat is looked up before returning, so a missing chat raises
+        ValueError here rather than mid-stream. The returned iterator yields
+        {"type": "delta", "content": str} events and ends with
+        {"type": "done", "message": Message} once the answer has been saved.
+        The question is saved before streaming starts, so it is kept even if
+        the client disconnects before the answer is complete.
+        """
+        chat_session, is_first_message, current_time, chat_history = await self._start_turn(question)
+        chat_session.updated_at = current_time
+        await self._chat_repository.save(chat_session)
+        
+        if not use_tools:
+            return self._stream_rag_answer(question, chat_session, current_time, chat_history, top_k)
+        
+        async def events() -> AsyncIterator[Dict[str, Any]]:
+            try:
+                question_embedding, tool_response = await self._lookup_answer(question, is_first_message)
+                
+                if tool_response is not None:
+                    logger.debug("Answer cache hit, skipping retrieval and generation")
+                else:
+                    async for event in self._llm_service.stream_answer_with_tools(question.text, chat_history):
+                        if event["type"] == "done":
+                            tool_response = event["result"]
+                        else:
+                            yield event
+                    self._remember_answer(question_embedding, tool_response)
+                
+                # The final message carries the formatted answer, including its
+                # Sources section, which replaces the streamed draft
+                bot_message = Message(
+                    content=tool_response["content"],
+                    is_bot=True,
+                    timestamp=current_time,
+                    references=tool_response.get("references", [])
+                )
+                
+                chat_session.messages.append(bot_message)
+                chat_session.updated_at = current_time
+                await self._chat_repository.save(chat_session)
+                
+            except Exception as e:
+                raise await self._save_error(chat_session, current_time, e)
             
-            # Create error response
-            error_response = Message(
-                content="I apologize, but I couldn't process your question. Please try again.",
+            yield {"type": "done", "message": bot_message}
+        
+        return events()
+    
+    async def _stream_rag_answer(
+        self,
+        question: Question,
+        chat_session: ChatSession,
+        current_time: datetime,
+        chat_history: List[Dict[str, Any]],
+        top_k: int
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a retrieval-augmented answer (no tool calling) and save it once complete."""
+        try:
+            embedding = await self._embedding_service.generate_embedding(question.text)
+            documents = await self._search_documents(question.text, embedding, top_k)
+            rag_context = await self._context_builder.build_context(documents, question.text)
+            
+            content_parts = []
+            async for text in self._llm_service.stream_answer(
+                question.text, rag_context.context_text, chat_history
+            ):
+                content_parts.append(text)
+                yield {"type": "delta", "content": text}
+            
+            bot_message = Message(
+                content="".join(content_parts),
                 is_bot=True,
-                timestamp=current_time
+                timestamp=current_time,
+                references=[ref.__dict__ for ref in rag_context.references]
             )
             
-            chat_session.messages.append(error_response)
+            chat_session.messages.append(bot_message)
+            chat_session.updated_at = current_time
             await self._chat_repository.save(chat_session)
             
-            raise Exception(error_message)
+        except Exception as e:
+            raise await self._save_error(chat_session, current_time, e)
+        
+        yield {"type": "done", "message": bot_message}
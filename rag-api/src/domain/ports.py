@@ -1,7 +1,8 @@
 """Domain ports (interfaces) for the RAG API."""
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Dict, Any
 from uuid import UUID
 
 from .entities import ChatSession, Message, Document, Question, ChatResponse, RAGContext
@@ -44,10 +45,27 @@ class VectorDatabase(ABC):
         """Search for similar documents using vector similarity."""
         pass
     
+    @abstractmethod
+    async def search_similar_documents_batch(
+        self, embeddings: List[List[float]], limit: int = 5
+    ) -> List[List[Document]]:
+        """Search for the documents similar to each embedding, preserving their order."""
+        pass
+    
     @abstractmethod
     async def verify_connection(self) -> bool:
         """Verify database connection."""
         pass
+    
+    @abstractmethod
+    async def warm_up(self) -> None:
+        """Connect and prepare the collection ahead of the first search."""
+        pass
+    
+    @abstractmethod
+    async def close(self) -> None:
+        """Release background resources when the application shuts down."""
+        pass
 
 
 class EmbeddingService(ABC):
@@ -57,6 +75,21 @@ class EmbeddingService(ABC):
     async def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for the given text."""
         pass
+    
+    @abstractmethod
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts, preserving their order."""
+        pass
+    
+    @abstractmethod
+    async def warm_up(self) -> None:
+        """Prepare background resources ahead of the first request."""
+        pass
+    
+    @abstractmethod
+    async def close(self) -> None:
+        """Release background resources when the application shuts down."""
+        pass
 
 
 class LLMService(ABC):
@@ -72,6 +105,16 @@ class LLMService(ABC):
         """Generate an answer using the LLM."""
         pass
     
+    @abstractmethod
+    def stream_answer(
+        self, 
+        question: str, 
+        context: str, 
+        chat_history: List[Dict[str, Any]]
+    ) -> AsyncIterator[str]:
+        """Stream the answer generate_answer would return, yielding text as it is generated."""
+        pass
+    
     @abstractmethod
     async def generate_answer_with_tools(
         self, 
@@ -80,6 +123,29 @@ class LLMService(ABC):
     ) -> Dict[str, Any]:
         """Generate an answer using LLM with tool calling capabilities."""
         pass
+    
+    @abstractmethod
+    def stream_answer_with_tools(
+        self, 
+        question: str, 
+        chat_history: List[Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an answer using LLM with tool calling capabilities.
+        
+        Yields {"type": "delta", "content": str} events as text is generated and
+        ends with {"type": "done", "result": dict}, where the result has the
+        same shape as generate_answer_with_tools returns.
+        """
+        pass
+
+
+class DocumentReranker(ABC):
+    """Port for reordering retrieved documents by relevance to a question."""
+    
+    @abstractmethod
+    async def rerank(self, question: str, documents: List[Document], top_k: int) -> List[Document]:
+        """Return the top_k documents most relevant to the question, best first."""
+        pass
 
 
 class RAGContextBuilder(ABC):
@@ -98,3 +164,22 @@ class TimestampService(ABC):
     def get_current_timestamp(self) -> str:
         """Get current timestamp as ISO string."""
         pass
+    
+    @abstractmethod
+    def get_current_datetime(self) -> datetime:
+        """Get current time as a datetime."""
+        pass
+
+
+class AnswerCache(ABC):
+    """Port for reusing answers to semantically equivalent questions."""
+    
+    @abstractmethod
+    def get(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Get the cached answer for a similar question, if any."""
+        pass
+    
+    @abstractmethod
+    def put(self, embedding: List[float], answer: Dict[str, Any]) -> None:
+        """Store the answer to a question."""
+        pass
@@ -0,0 +1,143 @@
+"""Micro-batching of independent calls to external services."""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Queued by stop() to end the background thread
+_STOP = object()
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesce items submitted within a short window into a single batch call.
+
+    Items may be submitted from any thread or event loop. A background thread
+    waits for the first item, collects more for up to ``max_wait_ms`` or until
+    ``max_batch_size`` items are queued, then calls ``process_batch`` once with
+    all of them. ``process_batch`` must return one result per item, in order.
+
+    With ``max_concurrency`` above 1, up to that many batches run at once on
+    a thread pool; otherwise they run one at a time on the background thread.
+    While every slot is busy, new items keep queueing into the next batch.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[T]], List[R]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 20.0,
+        name: str = "micro-batcher",
+        max_concurrency: int = 1
+    ):
+        self._process_batch = process_batch
+        self._max_batch_size = max(max_batch_size, 1)
+        self._max_wait = max_wait_ms / 1000.0
+        self._name = name
+        self._queue: "queue.Queue[Tuple[T, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._max_concurrency = max(max_concurrency, 1)
+        self._slots = threading.Semaphore(self._max_concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> None:
+        """Start the background thread if it is not already running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._max_concurrency > 1 and self._executor is None:
+                    self._executor = ThreadPoolExecutor(self._max_concurrency, thread_name_prefix=self._name)
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop the background thread once the items already queued are processed."""
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._queue.put((_STOP, None))
+        thread.join(timeout)
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def submit(self, item: T) -> Future:
+        """Queue an item and return a future resolved with its result."""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    async def run(self, item: T) -> R:
+        """Queue an item and await its result from a coroutine."""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _collect_batch(self) -> Tuple[List[Tuple[T, Future]], bool]:
+        """Return the next batch and whether stop() was requested."""
+        first = self._queue.get()
+        if first[0] is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self._max_wait
+
+        while len(batch) < self._max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry[0] is _STOP:
+                return batch, True
+            batch.append(entry)
+
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            # Collect only once a slot is free, so items queue into a larger batch meanwhile
+            self._slots.acquire()
+            batch, stopping = self._collect_batch()
+            # Items whose caller was cancelled while queued are dropped; the
+            # others can no longer be cancelled once marked as running
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                self._slots.release()
+            elif self._executor is not None:
+                self._executor.submit(self._process, batch)
+            else:
+                self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch: List[Tuple[T, Future]]) -> None:
+        """Run one batch, resolve the futures of its items and free its slot."""
+        items = [item for item, _ in batch]
+
+        try:
+            results = self._process_batch(items)
+            if len(results) != len(items):
+                raise ValueError(f"{self._name} returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,274 @@
+"""In-process caches used to avoid repeated calls to external services."""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..domain.ports import AnswerCache
+from .similarity import int8_cosine_similarities, quantize_int8, similarity_scores
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache mapping query text to its embedding.
+
+    Texts are keyed case- and whitespace-insensitively, so questions that
+    differ only in capitalisation or spacing share an entry.
+    """
+
+    def __init__(self, max_size: int = 512):
+        self._max_size = max_size
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Return the cache key for a text."""
+        return " ".join(text.split()).casefold()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for the text, if present."""
+        text = self.normalize(text)
+        with self._lock:
+            embedding = self._entries.get(text)
+            if embedding is not None:
+                self._entries.move_to_end(text)
+                self._hits += 1
+            else:
+                self._misses += 1
+            return embedding
+
+    def put(self, text: str, embedding: List[float]) -> None:
+        """Store an embedding, evicting the least recently used entry if full."""
+        if self._max_size <= 0:
+            return
+
+        text = self.normalize(text)
+        with self._lock:
+            self._entries[text] = embedding
+            self._entries.move_to_end(text)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "capacity": self._max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisEmbeddingCache:
+    """Embedding cache shared by all workers through Redis.
+
+    Second tier behind the per-process ``EmbeddingCache``. Vectors are stored
+    as raw float32 bytes under a hash of the model and the normalised text.
+    Redis errors count as misses, so an unavailable Redis never fails a
+    request. A ``ttl_seconds`` of 0 stores embeddings without expiry.
+    """
+
+    def __init__(self, client: Any, model: str, ttl_seconds: int = 86400, prefix: str = "emb:"):
+        self._client = client
+        self._model = model
+        # Redis rejects EX 0; None stores without expiry
+        self._ttl = ttl_seconds or None
+        self._prefix = prefix
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        self._lock = threading.Lock()
+
+    def _key(self, text: str) -> str:
+        material = f"{self._model}\0{EmbeddingCache.normalize(text)}".encode()
+        return self._prefix + hashlib.blake2b(material, digest_size=16).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return the shared embedding of each text, or None where absent."""
+        try:
+            values = self._client.mget([self._key(text) for text in texts])
+        except Exception as e:
+            logger.warning("Shared embedding cache unavailable: %s", e)
+            with self._lock:
+                self._errors += 1
+            return [None] * len(texts)
+
+        embeddings = [np.frombuffer(value, dtype=np.float32).tolist() if value else None for value in values]
+        found = sum(embedding is not None for embedding in embeddings)
+        with self._lock:
+            self._hits += found
+            self._misses += len(embeddings) - found
+        return embeddings
+
+    def put_many(self, embeddings: Dict[str, List[float]]) -> None:
+        """Store embeddings keyed by their text, in one round trip."""
+        try:
+            pipeline = self._client.pipeline(transaction=False)
+            for text, embedding in embeddings.items():
+                pipeline.set(self._key(text), np.asarray(embedding, dtype=np.float32).tobytes(), ex=self._ttl)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning("Could not store embeddings in the shared cache: %s", e)
+            with self._lock:
+                self._errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters of this process's lookups."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "ttl_seconds": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "errors": self._errors,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+
+class SemanticCache:
+    """Similarity cache keyed on query embeddings.
+
+    Entries live in a fixed-size ring buffer. A lookup is a hit when a cached
+    query has cosine similarity of at least ``threshold`` with the new one.
+    Query vectors are stored as int8 codes quantised with a per-vector scale
+    (a quarter of the float32 size), or as float16. With ``ttl_seconds`` above
+    0, entries older than that no longer match.
+    """
+
+    def __init__(self, max_size: int = 256, threshold: float = 0.95, dtype: str = "int8", ttl_seconds: float = 0):
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported semantic cache dtype: {dtype}")
+
+        self._max_size = max_size
+        self._threshold = threshold
+        self._dtype = dtype
+        self._ttl = ttl_seconds
+        # Allocated on first insert, once the embedding dimension is known
+        self._vectors: Optional[np.ndarray] = None
+        self._limits = np.zeros(max(max_size, 0), dtype=np.int32)
+        self._stored_at = np.zeros(max(max_size, 0), dtype=np.float64)
+        self._payloads: List[Any] = [None] * max(max_size, 0)
+        self._count = 0
+        self._next = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _lookup(self, embedding: List[float], min_limit: int = 0) -> Optional[Any]:
+        """Return the payload of the most similar entry stored with at least ``min_limit``."""
+        if self._max_size <= 0:
+            return None
+
+        query = self._normalize(embedding)
+        with self._lock:
+            if self._count and self._vectors.shape[1] == query.shape[0]:
+                if self._dtype == "int8":
+                    similarities = int8_cosine_similarities(self._vectors[:self._count], quantize_int8(query)[0])
+                else:
+                    similarities = similarity_scores(self._vectors[:self._count], query)
+                similarities[self._limits[:self._count] < min_limit] = -1.0
+                if self._ttl > 0:
+                    similarities[self._stored_at[:self._count] < time.monotonic() - self._ttl] = -1.0
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self._threshold:
+                    self._hits += 1
+                    return self._payloads[best]
+            self._misses += 1
+            return None
+
+    def _store(self, embedding: List[float], payload: Any, limit: int = 0) -> None:
+        """Store a payload, overwriting the oldest entry if full."""
+        if self._max_size <= 0:
+            return
+
+        query = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self._vectors = np.zeros((self._max_size, query.shape[0]), dtype=self._dtype)
+                self._count = 0
+                self._next = 0
+            if self._dtype == "int8":
+                self._vectors[self._next] = quantize_int8(query)[0]
+            else:
+                self._vectors[self._next] = query
+            self._limits[self._next] = limit
+            self._stored_at[self._next] = time.monotonic()
+            self._payloads[self._next] = payload
+            self._next = (self._next + 1) % self._max_size
+            self._count = min(self._count + 1, self._max_size)
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the hit/miss counters."""
+        with self._lock:
+            self._payloads = [None] * max(self._max_size, 0)
+            self._count = 0
+            self._next = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": self._count,
+                "capacity": self._max_size,
+                "threshold": self._threshold,
+                "dtype": self._dtype,
+                "ttl_seconds": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class SemanticSearchCache(SemanticCache):
+    """Cache of vector search results for near-identical query embeddings.
+
+    A cached search only answers requests for at most as many results as it
+    was run with.
+    """
+
+    def get(self, embedding: List[float], limit: int) -> Optional[List[Any]]:
+        """Return cached results for a similar query, if any."""
+        results = self._lookup(embedding, min_limit=limit)
+        return list(results[:limit]) if results is not None else None
+
+    def put(self, embedding: List[float], limit: int, results: List[Any]) -> None:
+        """Store the results of a search."""
+        self._store(embedding, list(results), limit)
+
+
+class SemanticAnswerCache(SemanticCache, AnswerCache):
+    """Cache of final answers for near-identical standalone questions."""
+
+    def get(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Return the cached answer for a similar question, if any."""
+        answer = self._lookup(embedding)
+        return dict(answer) if answer is not None else None
+
+    def put(self, embedding: List[float], answer: Dict[str, Any]) -> None:
+        """Store the answer to a question."""
+        self._store(embedding, dict(answer))
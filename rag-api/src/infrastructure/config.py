@@ -2,7 +2,7 @@
 
 import os
 from pathlib import Path
-from typing import List
+from typing import Tuple
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
@@ -18,6 +18,7 @@ class APIConfig:
     title: str = "Window to Truth API"
     description: str = "API for queries about the Colombian conflict using RAG with Truth Commission data"
     version: str = "1.0.0"
+    log_level: str = "INFO"
 
 
 @dataclass
@@ -27,14 +28,22 @@ class OpenAIConfig:
     embedding_model: str = "text-embedding-3-large"  # Use 3-large for 3072 dimensions
     completion_model: str = "gpt-4o-mini"
     embedding_dimension: int = 3072  # Match your Milvus collection
+    max_connections: int = 64
+    max_keepalive_connections: int = 32
+    max_prompt_tokens: int = 6000
+    max_history_tokens: int = 2000
+    single_pass_rag: bool = False
 
 
 @dataclass
 class DatabaseConfig:
     """Database configuration settings."""
-    storage_type: str  # "sqlite" or "memory"
+    storage_type: str  # "sqlite", "redis" or "memory"
     sqlite_path: str
     enable_migration: bool = True
+    memory_max_chats: int = 10000
+    memory_chat_ttl: int = 86400
+    memory_max_messages: int = 200
 
 
 @dataclass
@@ -44,7 +53,51 @@ class MilvusConfig:
     port: str
     database: str
     collection_name: str
-    alternative_collection_names: List[str]
+    alternative_collection_names: Tuple[str, ...]
+    search_ef: int = 64
+    rerank_factor: int = 1
+    mmr_lambda: float = 1.0
+
+
+@dataclass
+class BatchingConfig:
+    """Request micro-batching settings."""
+    embedding_batch_size: int = 32
+    embedding_batch_wait_ms: float = 20.0
+    search_batch_size: int = 16
+    search_batch_wait_ms: float = 20.0
+    search_batch_concurrency: int = 4
+
+
+@dataclass
+class CacheConfig:
+    """In-process cache configuration settings."""
+    embedding_cache_size: int = 512
+    search_cache_size: int = 256
+    search_cache_threshold: float = 0.95
+    search_cache_dtype: str = "int8"
+    search_cache_ttl: float = 3600
+    answer_cache_size: int = 0
+    answer_cache_threshold: float = 0.95
+    answer_cache_dtype: str = "int8"
+
+
+@dataclass
+class RedisConfig:
+    """Redis settings for state shared between worker processes."""
+    url: str = ""
+    embedding_cache_ttl: int = 86400
+    chat_ttl: int = 0
+    socket_timeout: float = 0.5
+    connect_timeout: float = 0.5
+
+
+@dataclass
+class RerankConfig:
+    """Cross-encoder reranking settings."""
+    model: str = ""
+    candidates: int = 20
+    batch_size: int = 32
 
 
 @dataclass
@@ -57,10 +110,14 @@ class ConfigService:
     """Service for managing application configuration."""
     
     def __init__(self):
-        self._api_config = APIConfig()
+        self._api_config = self._load_api_config()
         self._database_config = self._load_database_config()
         self._milvus_config = self._load_milvus_config()
         self._openai_config = self._load_openai_config()
+        self._cache_config = self._load_cache_config()
+        self._batching_config = self._load_batching_config()
+        self._rerank_config = self._load_rerank_config()
+        self._redis_config = self._load_redis_config()
         self._app_config = AppConfig()
         self._auto_discover_dimensions()
     
@@ -100,7 +157,18 @@ class ConfigService:
             api_key=api_key,
             embedding_model=os.getenv("EMBEDDING_MODEL", "text-embedding-3-large"),
             completion_model=os.getenv("COMPLETION_MODEL", "gpt-4o-mini"),
-            embedding_dimension=int(os.getenv("EMBEDDING_DIMENSION", "3072"))
+            embedding_dimension=int(os.getenv("EMBEDDING_DIMENSION", "3072")),
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "64")),
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "32")),
+            max_prompt_tokens=int(os.getenv("MAX_PROMPT_TOKENS", "6000")),
+            max_history_tokens=int(os.getenv("MAX_HISTORY_TOKENS", "2000")),
+            single_pass_rag=os.getenv("SINGLE_PASS_RAG", "false").lower() == "true"
+        )
+    
+    def _load_api_config(self) -> APIConfig:
+        """Load API configuration from environment."""
+        return APIConfig(
+            log_level=os.getenv("LOG_LEVEL", "INFO").upper()
         )
     
     def _load_database_config(self) -> DatabaseConfig:
@@ -108,29 +176,80 @@ class ConfigService:
         return DatabaseConfig(
             storage_type=os.getenv("STORAGE_TYPE", "sqlite"),
             sqlite_path=os.getenv("SQLITE_PATH", "data/chat_sessions.db"),
-            enable_migration=os.getenv("ENABLE_MIGRATION", "true").lower() == "true"
+            enable_migration=os.getenv("ENABLE_MIGRATION", "true").lower() == "true",
+            memory_max_chats=int(os.getenv("MEMORY_MAX_CHATS", "10000")),
+            memory_chat_ttl=int(os.getenv("MEMORY_CHAT_TTL", "86400")),
+            memory_max_messages=int(os.getenv("MEMORY_MAX_MESSAGES", "200"))
+        )
+    
+    def _load_cache_config(self) -> CacheConfig:
+        """Load cache configuration from environment."""
+        return CacheConfig(
+            embedding_cache_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "512")),
+            search_cache_size=int(os.getenv("SEARCH_CACHE_SIZE", "256")),
+            search_cache_threshold=float(os.getenv("SEARCH_CACHE_THRESHOLD", "0.95")),
+            search_cache_dtype=os.getenv("SEARCH_CACHE_DTYPE", "int8"),
+            search_cache_ttl=float(os.getenv("SEARCH_CACHE_TTL", "3600")),
+            answer_cache_size=int(os.getenv("ANSWER_CACHE_SIZE", "0")),
+            answer_cache_threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+            answer_cache_dtype=os.getenv("ANSWER_CACHE_DTYPE", "int8")
+        )
+    
+    def _load_redis_config(self) -> RedisConfig:
+        """Load Redis configuration from environment."""
+        return RedisConfig(
+            url=os.getenv("REDIS_URL", ""),
+            embedding_cache_ttl=int(os.getenv("EMBEDDING_CACHE_TTL", "86400")),
+            chat_ttl=int(os.getenv("CHAT_TTL", "0")),
+            socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5")),
+            connect_timeout=float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))
         )
     
     def _load_milvus_config(self) -> MilvusConfig:
         """Load Milvus configuration from environment."""
         host = os.getenv("MILVUS_HOST", "milvus")
         port = os.getenv("MILVUS_PORT", "19530")
+        search_ef = int(os.getenv("MILVUS_SEARCH_EF", "64"))
+        rerank_factor = int(os.getenv("MILVUS_RERANK_FACTOR", "1"))
+        mmr_lambda = float(os.getenv("MILVUS_MMR_LAMBDA", "1.0"))
         database = "colombia_data_qaps"
         collection_name = "source_abstract"
         
-        alternative_names = [
+        # Immutable and without repeats, so each name is probed at most once
+        alternative_names = tuple(dict.fromkeys([
             "source_abstract",
             "colombia_data_qaps.source_abstract",
             f"{database}.{collection_name}",
             f"default_{collection_name}"
-        ]
+        ]))
         
         return MilvusConfig(
             host=host,
             port=port,
             database=database,
             collection_name=collection_name,
-            alternative_collection_names=alternative_names
+            alternative_collection_names=alternative_names,
+            search_ef=search_ef,
+            rerank_factor=rerank_factor,
+            mmr_lambda=mmr_lambda
+        )
+    
+    def _load_batching_config(self) -> BatchingConfig:
+        """Load request batching configuration from environment."""
+        return BatchingConfig(
+            embedding_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "32")),
+            embedding_batch_wait_ms=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "20")),
+            search_batch_size=int(os.getenv("SEARCH_BATCH_SIZE", "16")),
+            search_batch_wait_ms=float(os.getenv("SEARCH_BATCH_WAIT_MS", "20")),
+            search_batch_concurrency=int(os.getenv("SEARCH_BATCH_CONCURRENCY", "4"))
+        )
+    
+    def _load_rerank_config(self) -> RerankConfig:
+        """Load reranking configuration from environment."""
+        return RerankConfig(
+            model=os.getenv("RERANK_MODEL", ""),
+            candidates=int(os.getenv("RERANK_CANDIDATES", "20")),
+            batch_size=int(os.getenv("RERANK_BATCH_SIZE", "32"))
         )
     
     @property
@@ -153,6 +272,26 @@ class ConfigService:
         """Get Milvus configuration."""
         return self._milvus_config
     
+    @property
+    def cache(self) -> CacheConfig:
+        """Get cache configuration."""
+        return self._cache_config
+    
+    @property
+    def batching(self) -> BatchingConfig:
+        """Get request batching configuration."""
+        return self._batching_config
+    
+    @property
+    def rerank(self) -> RerankConfig:
+        """Get reranking configuration."""
+        return self._rerank_config
+    
+    @property
+    def redis(self) -> RedisConfig:
+        """Get Redis configuration."""
+        return self._redis_config
+    
     @property
     def app(self) -> AppConfig:
         """Get application configuration."""
@@ -8,6 +8,7 @@ from ..infrastructure.config import config_service
 from ..infrastructure.dependencies import get_chat_repository
 from ..adapters.repositories.sqlite_chat_repository import SQLiteChatSessionRepository
 from ..adapters.repositories.memory_chat_repository import InMemoryChatSessionRepository
+from ..adapters.repositories.redis_chat_repository import RedisChatSessionRepository
 from ..adapters.repositories.migration import ChatStorageMigration
 
 
@@ -37,6 +38,9 @@ async def initialize_database():
         except Exception as e:
             print(f"⚠️  Could not retrieve statistics: {e}")
     
+    elif isinstance(repository, RedisChatSessionRepository):
+        print("✅ Redis chat storage initialized")
+    
     elif isinstance(repository, InMemoryChatSessionRepository):
         print("✅ In-memory storage initialized")
         print("⚠️  Note: Chat data will not persist between restarts")
@@ -1,9 +1,15 @@
 """Dependency injection container for the application."""
 
+import logging
 from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import httpx
+from openai import OpenAI
 
 from ..domain.ports import (
     ChatSessionRepository,
+    DocumentReranker,
     VectorDatabase,
     EmbeddingService,
     LLMService,
@@ -13,11 +19,107 @@ from ..domain.ports import (
 from ..application.use_cases import ChatSessionUseCase, QuestionAnsweringUseCase
 from ..adapters.repositories.memory_chat_repository import InMemoryChatSessionRepository
 from ..adapters.repositories.sqlite_chat_repository import SQLiteChatSessionRepository
+from ..adapters.repositories.redis_chat_repository import RedisChatSessionRepository
 from ..adapters.repositories.milvus_vector_db import MilvusVectorDatabase
 from ..adapters.external.openai_services import OpenAIEmbeddingService, OpenAILLMService
 from .services import DefaultRAGContextBuilder, DefaultTimestampService
+from .cache import EmbeddingCache, RedisEmbeddingCache, SemanticAnswerCache, SemanticSearchCache
 from .config import config_service
 
+logger = logging.getLogger(__name__)
+
+
+# Cache instances
+@lru_cache()
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the exact-match question embedding cache instance."""
+    return EmbeddingCache(max_size=config_service.cache.embedding_cache_size)
+
+
+@lru_cache()
+def get_redis_client() -> Optional[Any]:
+    """Get the Redis client, or None if Redis is not configured or unavailable."""
+    redis_config = config_service.redis
+    if not redis_config.url:
+        return None
+    
+    try:
+        # Import here so the redis package is only needed when Redis is configured
+        import redis
+        # Short timeouts so a hung or unreachable Redis fails fast and callers
+        # fall back instead of blocking the request
+        return redis.Redis.from_url(
+            redis_config.url,
+            socket_timeout=redis_config.socket_timeout,
+            socket_connect_timeout=redis_config.connect_timeout
+        )
+    except Exception as e:
+        logger.warning("Could not create Redis client for %s, shared state disabled: %s", redis_config.url, e)
+        return None
+
+
+@lru_cache()
+def get_shared_embedding_cache() -> Optional[RedisEmbeddingCache]:
+    """Get the cross-worker embedding cache, or None without Redis."""
+    client = get_redis_client()
+    if client is None:
+        return None
+    return RedisEmbeddingCache(
+        client,
+        model=config_service.openai.embedding_model,
+        ttl_seconds=config_service.redis.embedding_cache_ttl
+    )
+
+
+@lru_cache()
+def get_search_cache() -> SemanticSearchCache:
+    """Get the vector search result cache instance."""
+    cache_config = config_service.cache
+    return SemanticSearchCache(
+        max_size=cache_config.search_cache_size,
+        threshold=cache_config.search_cache_threshold,
+        dtype=cache_config.search_cache_dtype,
+        ttl_seconds=cache_config.search_cache_ttl
+    )
+
+
+@lru_cache()
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Get the answer cache instance, or None when it is disabled (the default)."""
+    cache_config = config_service.cache
+    if cache_config.answer_cache_size <= 0:
+        return None
+    return SemanticAnswerCache(
+        max_size=cache_config.answer_cache_size,
+        threshold=cache_config.answer_cache_threshold,
+        dtype=cache_config.answer_cache_dtype
+    )
+
+
+async def check_readiness() -> bool:
+    """Return whether the Milvus collection is loaded, loading it if it is not yet."""
+    try:
+        await get_vector_database().warm_up()
+        return True
+    except Exception as e:
+        logger.warning("Not ready, Milvus collection unavailable: %s", e)
+        return False
+
+
+def get_cache_statistics() -> Dict[str, Any]:
+    """Get hit/miss statistics of the in-process caches of this worker."""
+    statistics = {
+        "embeddings": get_embedding_cache().stats(),
+        "search": get_search_cache().stats()
+    }
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        statistics["answers"] = answer_cache.stats()
+    shared_embedding_cache = get_shared_embedding_cache()
+    if shared_embedding_cache is not None:
+        statistics["shared_embeddings"] = shared_embedding_cache.stats()
+    return statistics
+
 
 # Repository instances
 @lru_cache()
@@ -31,8 +133,17 @@ def get_chat_repository() -> ChatSessionRepository:
         db_path = database_config.sqlite_path
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         return SQLiteChatSessionRepository(db_path)
+    elif database_config.storage_type == "redis":
+        client = get_redis_client()
+        if client is None:
+            raise ValueError("STORAGE_TYPE=redis requires REDIS_URL and the redis package")
+        return RedisChatSessionRepository(client, ttl_seconds=config_service.redis.chat_ttl)
     else:
-        return InMemoryChatSessionRepository()
+        return InMemoryChatSessionRepository(
+            max_chats=database_config.memory_max_chats,
+            ttl_seconds=database_config.memory_chat_ttl,
+            max_messages=database_config.memory_max_messages
+        )
 
 
 @lru_cache()
@@ -44,11 +155,34 @@ def get_vector_database() -> VectorDatabase:
         port=milvus_config.port,
         database=milvus_config.database,
         collection_name=milvus_config.collection_name,
-        alternative_names=milvus_config.alternative_collection_names
+        alternative_names=milvus_config.alternative_collection_names,
+        search_ef=milvus_config.search_ef,
+        rerank_factor=milvus_config.rerank_factor,
+        mmr_lambda=milvus_config.mmr_lambda,
+        cache=get_search_cache(),
+        expected_dimension=config_service.openai.embedding_dimension,
+        batch_size=config_service.batching.search_batch_size,
+        batch_wait_ms=config_service.batching.search_batch_wait_ms,
+        batch_concurrency=config_service.batching.search_batch_concurrency
     )
 
 
 # Service instances
+@lru_cache()
+def get_openai_client() -> OpenAI:
+    """Get the OpenAI client shared by all services, with a keep-alive connection pool."""
+    openai_config = config_service.openai
+    return OpenAI(
+        api_key=openai_config.api_key,
+        http_client=httpx.Client(
+            limits=httpx.Limits(
+                max_connections=openai_config.max_connections,
+                max_keepalive_connections=openai_config.max_keepalive_connections
+            )
+        )
+    )
+
+
 @lru_cache()
 def get_embedding_service() -> EmbeddingService:
     """Get embedding service instance."""
@@ -56,7 +190,12 @@ def get_embedding_service() -> EmbeddingService:
     return OpenAIEmbeddingService(
         api_key=openai_config.api_key,
         model=openai_config.embedding_model,
-        expected_dimension=openai_config.embedding_dimension
+        expected_dimension=openai_config.embedding_dimension,
+        cache=get_embedding_cache(),
+        shared_cache=get_shared_embedding_cache(),
+        client=get_openai_client(),
+        batch_size=config_service.batching.embedding_batch_size,
+        batch_wait_ms=config_service.batching.embedding_batch_wait_ms
     )
 
 
@@ -66,10 +205,29 @@ def get_llm_service() -> LLMService:
     openai_config = config_service.openai
     return OpenAILLMService(
         api_key=openai_config.api_key,
-        model=openai_config.completion_model
+        model=openai_config.completion_model,
+        client=get_openai_client(),
+        single_pass=openai_config.single_pass_rag,
+        max_history_tokens=openai_config.max_history_tokens
     )
 
 
+@lru_cache()
+def get_reranker() -> Optional[DocumentReranker]:
+    """Get the document reranker instance, or None if reranking is disabled."""
+    rerank_config = config_service.rerank
+    if not rerank_config.model:
+        return None
+    
+    try:
+        # Import here so sentence-transformers is only needed when reranking is enabled
+        from ..adapters.external.cross_encoder_reranker import CrossEncoderReranker
+        return CrossEncoderReranker(rerank_config.model, batch_size=rerank_config.batch_size)
+    except Exception as e:
+        logger.warning("Could not load reranker %s, reranking disabled: %s", rerank_config.model, e)
+        return None
+
+
 @lru_cache()
 def get_context_builder() -> RAGContextBuilder:
     """Get RAG context builder instance."""
@@ -101,5 +259,8 @@ def get_question_answering_use_case() -> QuestionAnsweringUseCase:
         embedding_service=get_embedding_service(),
         llm_service=get_llm_service(),
         context_builder=get_context_builder(),
-        timestamp_service=get_timestamp_service()
+        timestamp_service=get_timestamp_service(),
+        answer_cache=get_answer_cache(),
+        reranker=get_reranker(),
+        rerank_candidates=config_service.rerank.candidates
     )
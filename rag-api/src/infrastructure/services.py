@@ -1,11 +1,14 @@
 """Service implementations for infrastructure concerns."""
 
+import logging
 from typing import List
 import datetime
 
 from ..domain.entities import Document, Reference, RAGContext
 from ..domain.ports import RAGContextBuilder, TimestampService
 
+logger = logging.getLogger(__name__)
+
 
 class DefaultRAGContextBuilder(RAGContextBuilder):
     """Default implementation of RAG context builder."""
@@ -15,40 +18,41 @@ class DefaultRAGContextBuilder(RAGContextBuilder):
         context_pieces = []
         references = []
         
-        print(f"Building context from {len(documents)} documents")
+        logger.debug("Building context from %s documents", len(documents))
         
         for i, doc in enumerate(documents):
             # Build context text
-            meta_string = ""
-            if doc.metadata.get("title"):
-                meta_string += f"Title: {doc.metadata['title']}\\n"
-            if doc.metadata.get("source_id"):
-                meta_string += f"Source: {doc.metadata['source_id']}\\n"
-            if doc.metadata.get("page"):
-                meta_string += f"Page: {doc.metadata['page']}\\n"
+            metadata = doc.metadata
+            meta_lines = []
+            if metadata.get("title"):
+                meta_lines.append(f"Title: {metadata['title']}\n")
+            if metadata.get("source_id"):
+                meta_lines.append(f"Source: {metadata['source_id']}\n")
+            if metadata.get("page"):
+                meta_lines.append(f"Page: {metadata['page']}\n")
             
-            full_content = ""
-            if meta_string:
-                full_content = f"{meta_string}\\n{doc.content}"
+            if meta_lines:
+                meta_lines.append(f"\n{doc.content}")
+                full_content = "".join(meta_lines)
             else:
                 full_content = doc.content
             
             if full_content.strip():
                 context_pieces.append(full_content)
-                print(f"Document {i+1}: Added {len(full_content)} characters to context")
+                logger.debug("Document %s: Added %s characters to context", i+1, len(full_content))
             
             # Build references (only for top 3 documents)
             if i < 3:
                 reference = self._build_reference(doc, i + 1)
                 references.append(reference)
         
-        context_text = "\\n\\n---\\n\\n".join(context_pieces)
+        context_text = "\n\n---\n\n".join(context_pieces)
         
         if not context_text.strip():
-            print("WARNING: No useful context found in documents")
+            logger.warning("No useful context found in documents")
             context_text = "No relevant information was found for this question in the database."
         
-        print(f"Total context: {len(context_text)} characters, {len(references)} references")
+        logger.debug("Total context: %s characters, %s references", len(context_text), len(references))
         
         return RAGContext(
             documents=documents,
@@ -80,12 +84,13 @@ class DefaultRAGContextBuilder(RAGContextBuilder):
         
         # Log for debugging
         if url:
-            print(f"Reference {number}: Found URL: {url}")
+            logger.debug("Reference %s: Found URL: %s", number, url)
         else:
-            print(f"Reference {number}: No URL found in metadata or original_fields")
-            print(f"Available metadata keys: {list(document.metadata.keys())}")
-            if document.original_fields:
-                print(f"Available original_fields keys: {list(document.original_fields.keys())}")
+            logger.debug("Reference %s: No URL found in metadata or original_fields", number)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Available metadata keys: %s", list(document.metadata.keys()))
+                if document.original_fields:
+                    logger.debug("Available original_fields keys: %s", list(document.original_fields.keys()))
         
         return Reference(
             number=number,
@@ -104,4 +109,8 @@ class DefaultTimestampService(TimestampService):
     
     def get_current_timestamp(self) -> str:
         """Get current timestamp as ISO string."""
-        return datetime.datetime.now().isoformat()
+        return self.get_current_datetime().isoformat()
+    
+    def get_current_datetime(self) -> datetime.datetime:
+        """Get current time as a datetime."""
+        return datetime.datetime.now()
@@ -0,0 +1,158 @@
+"""Vectorised cosine similarity helpers for the in-process caches.
+
+Numba is used when installed to compile the MMR selection loop to native
+code, and SimSIMD for cosine scoring of int8 and unnormalised vectors;
+otherwise the same results are computed with numpy.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(fastmath=True, cache=True)
+    def _mmr_select(scores, vectors, k, lambda_):
+        count, dimension = vectors.shape
+        selected = np.empty(k, dtype=np.int64)
+        chosen = np.zeros(count, dtype=np.bool_)
+        redundancy = np.zeros(count, dtype=np.float32)
+        for step in range(k):
+            best = -1
+            best_value = -np.inf
+            for i in range(count):
+                if not chosen[i]:
+                    value = lambda_ * scores[i] - (1.0 - lambda_) * redundancy[i]
+                    if value > best_value:
+                        best = i
+                        best_value = value
+            selected[step] = best
+            chosen[best] = True
+            # Track each candidate's highest similarity to any selected one
+            for i in range(count):
+                if not chosen[i]:
+                    similarity = np.float32(0.0)
+                    for j in range(dimension):
+                        similarity += vectors[i, j] * vectors[best, j]
+                    if step == 0 or similarity > redundancy[i]:
+                        redundancy[i] = similarity
+        return selected
+
+
+def similarity_scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Return the dot product of every row of ``matrix`` with ``query``.
+
+    Both inputs are expected to be L2-normalised, so the result is the cosine
+    similarity of each row.
+    """
+    query = np.ascontiguousarray(query, dtype=np.float32)
+    return np.asarray(matrix, dtype=np.float32) @ query
+
+
+def quantize_int8(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Quantise a vector to int8 with a symmetric per-vector scale.
+
+    ``vector`` is approximately ``quantized * scale``.
+    """
+    scale = float(np.max(np.abs(vector))) / 127.0 or 1.0
+    return np.round(vector / scale).astype(np.int8), scale
+
+
+def int8_cosine_similarities(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Return the cosine similarity of int8 rows with an int8 query.
+
+    Cosine similarity ignores the quantisation scales, so the int8 codes are
+    compared directly, with SimSIMD's int8 kernel when it is installed.
+    """
+    if SIMSIMD_AVAILABLE:
+        distances = simsimd.cdist(query[None, :], np.ascontiguousarray(matrix), metric="cosine")
+        return 1.0 - np.asarray(distances, dtype=np.float32)[0]
+    return cosine_similarities(matrix, query)
+
+
+def cosine_similarities(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Return the cosine similarity of every row of ``matrix`` with ``query``.
+
+    Unlike ``similarity_scores`` the inputs need not be normalised.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    query = np.ascontiguousarray(query, dtype=np.float32)
+    if SIMSIMD_AVAILABLE:
+        distances = simsimd.cdist(query[None, :], matrix, metric="cosine")
+        return 1.0 - np.asarray(distances, dtype=np.float32)[0]
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    return (matrix @ query) / np.where(norms > 0, norms, 1.0)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the ``k`` highest scores, best first.
+
+    Only the selected scores are sorted, in O(n + k log k) rather than a full
+    O(n log n) sort.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    indices = np.argpartition(-scores, k - 1)[:k]
+    return indices[np.argsort(-scores[indices])]
+
+
+def mmr_select(scores: np.ndarray, vectors: np.ndarray, k: int, lambda_: float) -> np.ndarray:
+    """Return the indices of ``k`` candidates chosen by maximal marginal relevance.
+
+    Each step picks the candidate maximising ``lambda_ * score - (1 - lambda_)
+    * max similarity to the candidates already picked``, trading relevance
+    for diversity. ``vectors`` must be L2-normalised; ``lambda_ = 1`` is a
+    plain top-k by score.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    scores = np.ascontiguousarray(scores, dtype=np.float32)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if NUMBA_AVAILABLE:
+        return _mmr_select(scores, vectors, k, np.float32(lambda_))
+
+    selected = np.empty(k, dtype=np.int64)
+    redundancy = np.zeros(scores.shape[0], dtype=np.float32)
+    values = lambda_ * scores
+    for step in range(k):
+        best = int(np.argmax(values))
+        selected[step] = best
+        similarities = vectors @ vectors[best]
+        redundancy = similarities if step == 0 else np.maximum(redundancy, similarities)
+        values = lambda_ * scores - (1.0 - lambda_) * redundancy
+        values[selected[:step + 1]] = -np.inf
+    return selected
+
+
+def top_k_similar(
+    matrix: np.ndarray, query: np.ndarray, k: int, normalized: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the indices and scores of the ``k`` most similar rows, best first.
+
+    Pass ``normalized=False`` when the rows or query are not L2-normalised.
+    """
+    scores = similarity_scores(matrix, query) if normalized else cosine_similarities(matrix, query)
+    indices = top_k_indices(scores, k)
+    return indices, scores[indices]
+
+
+# Pay the JIT compilation cost at import instead of on the first request
+if NUMBA_AVAILABLE:
+    mmr_select(np.ones(2, dtype=np.float32), np.ones((2, 4), dtype=np.float32), 1, 0.5)
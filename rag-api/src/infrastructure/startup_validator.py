@@ -50,11 +50,13 @@ class StartupValidator:
             results["checks"]["expected_dimension"] = expected_dim
             results["checks"]["configured_dimension"] = configured_dim
             
+            # Every search would be rejected, so this is an error rather than a warning
             if expected_dim != configured_dim:
-                results["warnings"].append(
+                results["errors"].append(
                     f"Dimension mismatch: collection expects {expected_dim}, "
                     f"but service configured for {configured_dim}"
                 )
+                results["status"] = "error"
             
         except Exception as e:
             results["checks"]["dimension_compatibility"] = False
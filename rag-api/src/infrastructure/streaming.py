@@ -0,0 +1,57 @@
+"""Consume blocking iterators from async code."""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Callable, Iterator
+
+
+async def iterate_in_thread(make_iterator: Callable[[], Iterator[Any]]) -> AsyncIterator[Any]:
+    """Yield the items of a blocking iterator without blocking the event loop.
+
+    The iterator is drained in a worker thread that hands each item back to
+    the event loop through a queue. When the consumer stops early (the client
+    disconnects or the generator is closed), the worker stops after the item
+    it is waiting for and closes the iterator, so a generator's ``finally``
+    and ``with`` blocks release what it holds.
+    """
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    done = object()
+    abandoned = threading.Event()
+
+    def hand_over(item: Any) -> None:
+        try:
+            loop.call_soon_threadsafe(items.put_nowait, item)
+        except RuntimeError:
+            # The event loop has closed under the consumer
+            abandoned.set()
+
+    def produce() -> None:
+        iterator = None
+        try:
+            iterator = make_iterator()
+            for item in iterator:
+                if abandoned.is_set():
+                    break
+                hand_over(item)
+                if abandoned.is_set():
+                    break
+        except Exception as e:
+            hand_over(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            hand_over(done)
+
+    loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item = await items.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        abandoned.set()
@@ -0,0 +1,82 @@
+"""Token counting helpers used to keep prompts within a budget."""
+
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=1)
+def _get_encoding() -> Optional[Any]:
+    """Load the tiktoken encoding once, if tiktoken is installed and usable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning("tiktoken unavailable, estimating token counts from length: %s", e)
+        return None
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Count the tokens of a text, falling back to a ~4 characters per token estimate."""
+    if not text:
+        return 0
+    return _count_text_tokens(text)
+
+
+@lru_cache(maxsize=4096)
+def _count_text_tokens(text: str) -> int:
+    # History messages are resent on every turn, so their counts are memoised
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: Dict[str, Any]) -> int:
+    """Count the tokens a chat message contributes to a prompt."""
+    return count_tokens(message.get("content")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def recent_history(history: List[Dict[str, Any]], max_tokens: int) -> List[Dict[str, Any]]:
+    """Return the most recent chat history messages whose content fits in ``max_tokens``."""
+    budget = max_tokens
+    start = len(history)
+    while start > 0:
+        cost = count_tokens(history[start - 1].get("content")) + MESSAGE_OVERHEAD_TOKENS
+        if cost > budget:
+            break
+        budget -= cost
+        start -= 1
+    return history[start:]
+
+
+def trim_messages(messages: List[Dict[str, Any]], keep_from: int, max_tokens: int) -> List[Dict[str, Any]]:
+    """Drop the oldest history messages so the prompt fits in ``max_tokens``.
+
+    ``messages[0]`` (the system message) and everything from ``keep_from``
+    onwards (the current question and its tool-call frame) are always kept;
+    only the history between them is trimmed, newest messages first to stay.
+    """
+    if keep_from <= 1:
+        return messages
+
+    budget = max_tokens - count_message_tokens(messages[0])
+    budget -= sum(count_message_tokens(message) for message in messages[keep_from:])
+
+    history = messages[1:keep_from]
+    kept = len(history)
+    while kept > 0:
+        cost = count_message_tokens(history[kept - 1])
+        if cost > budget:
+            break
+        budget -= cost
+        kept -= 1
+
+    if kept == 0:
+        return messages
+    return [messages[0]] + history[kept:] + messages[keep_from:]
@@ -1,12 +1,90 @@
 """Main FastAPI application entry point."""
 
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+try:
+    # ORJSONResponse only fails when rendering, so check for orjson up front
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
 
 from .infrastructure.config import config_service
-from .infrastructure.dependencies import get_vector_database, get_chat_use_case, get_question_answering_use_case
+from .infrastructure.dependencies import (
+    get_embedding_service,
+    get_vector_database,
+    get_chat_use_case,
+    get_question_answering_use_case,
+    get_cache_statistics,
+    check_readiness
+)
 from .adapters.controllers.controllers import ChatController, QuestionController, HealthController
 
+# Per-request diagnostics are logged at DEBUG; set LOG_LEVEL=DEBUG to see them
+logging.basicConfig(
+    level=config_service.api.log_level,
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s"
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare shared resources before the worker starts serving requests."""
+    print("Starting RAG API with Hexagonal Architecture...")
+    
+    # Setup database first
+    from .infrastructure.database_setup import setup_database
+    await setup_database()
+    
+    # Resolve and load the Milvus collection once per worker, so the first
+    # question does not pay for the connection, lookup and load
+    try:
+        await get_vector_database().warm_up()
+    except Exception as e:
+        print(f"Milvus collection not ready, it will be resolved on the first search: {e}")
+    
+    # Start the embedding micro-batcher before requests can queue on it
+    await get_embedding_service().warm_up()
+    
+    # Run system validation
+    from .infrastructure.startup_validator import StartupValidator
+    
+    validation_results = {}
+    try:
+        validation_results = await StartupValidator.validate_system()
+        StartupValidator.print_validation_results(validation_results)
+        
+        if validation_results["status"] == "error":
+            print("⚠️  System validation failed! Some features may not work correctly.")
+        elif validation_results["status"] == "warning":
+            print("⚠️  System validation completed with warnings.")
+        else:
+            print("✅ System validation successful!")
+            
+    except Exception as e:
+        print(f"❌ System validation error: {e}")
+    
+    # A dimension mismatch is a configuration error that fails every question;
+    # refuse to start instead of answering each request with an error
+    checks = validation_results.get("checks", {})
+    if "expected_dimension" in checks and not checks["dimension_compatibility"]:
+        raise RuntimeError(
+            f"Embedding dimension mismatch: collection expects {checks['expected_dimension']}, "
+            f"but the embedding model is configured for {checks['configured_dimension']}. "
+            "Set EMBEDDING_MODEL and EMBEDDING_DIMENSION to match the collection."
+        )
+    
+    yield
+    
+    # Let queued embedding and search batches finish, then stop their threads
+    await get_embedding_service().close()
+    await get_vector_database().close()
+
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
@@ -18,6 +96,8 @@ def create_app() -> FastAPI:
         title=api_config.title,
         description=api_config.description + "\n\n## Authentication\n\nThis API requires an API key for most endpoints. Include your API key in the Authorization header:\n\n```\nAuthorization: Bearer YOUR_API_KEY\n```\n\nSee API_AUTH.md for detailed authentication instructions.",
         version=api_config.version,
+        lifespan=lifespan,
+        default_response_class=DefaultResponse,
         openapi_tags=[
             {
                 "name": "health",
@@ -48,7 +128,10 @@ def create_app() -> FastAPI:
     )
     
     # Initialize controllers
-    health_controller = HealthController()
+    health_controller = HealthController(
+        cache_stats_provider=get_cache_statistics,
+        readiness_check=check_readiness
+    )
     chat_controller = ChatController(get_chat_use_case())
     question_controller = QuestionController(get_question_answering_use_case())
     
@@ -67,33 +150,6 @@ def create_app() -> FastAPI:
     app.include_router(question_controller.router, prefix="/api")  # API key required  
     app.include_router(admin_controller.router, prefix="/api")     # API key required
     
-    # Verify system configuration on startup
-    @app.on_event("startup")
-    async def startup_event():
-        """Startup event handler."""
-        print("Starting RAG API with Hexagonal Architecture...")
-        
-        # Setup database first
-        from .infrastructure.database_setup import setup_database
-        await setup_database()
-        
-        # Run system validation
-        from .infrastructure.startup_validator import StartupValidator
-        
-        try:
-            validation_results = await StartupValidator.validate_system()
-            StartupValidator.print_validation_results(validation_results)
-            
-            if validation_results["status"] == "error":
-                print("⚠️  System validation failed! Some features may not work correctly.")
-            elif validation_results["status"] == "warning":
-                print("⚠️  System validation completed with warnings.")
-            else:
-                print("✅ System validation successful!")
-                
-        except Exception as e:
-            print(f"❌ System validation error: {e}")
-    
     return app
 
 
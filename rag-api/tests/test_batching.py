@@ -0,0 +1,182 @@
+"""Tests for the micro-batcher."""
+
+import asyncio
+import threading
+import time
+
+from src.infrastructure.batching import MicroBatcher
+
+
+def double_all(items):
+    return [item * 2 for item in items]
+
+
+def test_concurrent_items_are_processed_in_one_batch():
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return double_all(items)
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(*(batcher.run(i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+
+
+def test_batches_are_bounded_by_max_batch_size():
+    batches = []
+
+    def process(items):
+        batches.append(len(items))
+        return double_all(items)
+
+    batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(*(batcher.run(i) for i in range(5)))
+
+    assert asyncio.run(main()) == [0, 2, 4, 6, 8]
+    assert max(batches) <= 2
+
+
+def test_errors_are_raised_to_every_caller_in_the_batch():
+    def process(items):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=20)
+
+    async def main():
+        return await asyncio.gather(batcher.run(1), batcher.run(2), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_wrong_number_of_results_is_an_error():
+    batcher = MicroBatcher(lambda items: [], max_batch_size=8, max_wait_ms=1)
+
+    async def main():
+        return await batcher.run(1)
+
+    try:
+        asyncio.run(main())
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_cancelled_caller_does_not_stop_the_batcher():
+    release = threading.Event()
+
+    def process(items):
+        release.wait(1)
+        return double_all(items)
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=5)
+
+    async def main():
+        # Cancelled while its batch is being processed
+        cancelled = asyncio.create_task(batcher.run(1))
+        await asyncio.sleep(0.05)
+        cancelled.cancel()
+        release.set()
+        await asyncio.sleep(0.05)
+
+        # Cancelled while still queued behind a running batch
+        release.clear()
+        running = asyncio.create_task(batcher.run(2))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(batcher.run(3))
+        await asyncio.sleep(0)
+        queued.cancel()
+        release.set()
+        assert await asyncio.wait_for(running, timeout=2) == 4
+
+        return await asyncio.wait_for(batcher.run(21), timeout=2)
+
+    assert asyncio.run(main()) == 42
+    assert batcher._thread.is_alive()
+
+
+def test_dead_thread_is_restarted_on_submit():
+    batcher = MicroBatcher(double_all, max_batch_size=8, max_wait_ms=1)
+    batcher._thread = threading.Thread(target=lambda: None)
+    batcher._thread.start()
+    batcher._thread.join()
+
+    assert batcher.submit(5).result(timeout=2) == 10
+
+
+def test_stop_processes_queued_items_and_ends_the_thread():
+    def process(items):
+        time.sleep(0.02)
+        return double_all(items)
+
+    batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(5)]
+    thread = batcher._thread
+    batcher.stop()
+
+    assert [future.result(timeout=0) for future in futures] == [0, 2, 4, 6, 8]
+    assert not thread.is_alive()
+
+    # Submitting again starts a new thread
+    assert batcher.submit(3).result(timeout=2) == 6
+    batcher.stop()
+
+
+def test_stop_without_start_is_a_no_op():
+    MicroBatcher(double_all).stop()
+
+
+def test_batches_overlap_up_to_max_concurrency():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def process(items):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.1)
+        with lock:
+            running -= 1
+        return double_all(items)
+
+    batcher = MicroBatcher(process, max_batch_size=1, max_wait_ms=1, max_concurrency=3)
+
+    async def main():
+        return await asyncio.gather(*(batcher.run(i) for i in range(6)))
+
+    started = time.monotonic()
+    assert asyncio.run(main()) == [0, 2, 4, 6, 8, 10]
+    assert peak == 3
+    assert time.monotonic() - started < 0.5
+    batcher.stop()
+
+
+def test_single_slot_runs_batches_one_at_a_time():
+    running = 0
+    peak = 0
+
+    def process(items):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        time.sleep(0.02)
+        running -= 1
+        return double_all(items)
+
+    batcher = MicroBatcher(process, max_batch_size=1, max_wait_ms=1)
+
+    async def main():
+        return await asyncio.gather(*(batcher.run(i) for i in range(4)))
+
+    assert asyncio.run(main()) == [0, 2, 4, 6]
+    assert peak == 1
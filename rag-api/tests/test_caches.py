@@ -0,0 +1,192 @@
+"""Tests for the in-process and shared caches."""
+
+import numpy as np
+import pytest
+
+from src.infrastructure.cache import EmbeddingCache, RedisEmbeddingCache, SemanticAnswerCache, SemanticSearchCache
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+# EmbeddingCache
+
+def test_embedding_cache_keys_ignore_case_and_spacing():
+    cache = EmbeddingCache(max_size=4)
+    cache.put("¿Qué es  la Verdad?", [1.0, 2.0])
+
+    assert cache.get("  ¿qué es la verdad? ") == [1.0, 2.0]
+    assert cache.get("otra pregunta") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_embedding_cache_evicts_least_recently_used():
+    cache = EmbeddingCache(max_size=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")
+    cache.put("c", [3.0])
+
+    assert cache.get("a") == [1.0]
+    assert cache.get("b") is None
+    assert cache.get("c") == [3.0]
+    assert len(cache) == 2
+
+
+def test_embedding_cache_of_size_zero_stores_nothing():
+    cache = EmbeddingCache(max_size=0)
+    cache.put("a", [1.0])
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+# SemanticSearchCache / SemanticAnswerCache
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_search_cache_hits_near_identical_queries(dtype):
+    cache = SemanticSearchCache(max_size=4, threshold=0.95, dtype=dtype)
+    cache.put(unit(1, 0, 0), 5, ["a", "b", "c", "d", "e"])
+
+    assert cache.get(unit(1, 0.05, 0), 3) == ["a", "b", "c"]
+    assert cache.get(unit(0, 1, 0), 3) is None
+
+
+def test_search_cache_does_not_answer_larger_limits():
+    cache = SemanticSearchCache(max_size=4, threshold=0.95)
+    cache.put(unit(1, 0), 3, ["a", "b", "c"])
+
+    assert cache.get(unit(1, 0), 5) is None
+    assert cache.get(unit(1, 0), 2) == ["a", "b"]
+
+
+def test_search_cache_overwrites_the_oldest_entry_when_full():
+    cache = SemanticSearchCache(max_size=2, threshold=0.99)
+    cache.put(unit(1, 0, 0), 1, ["x"])
+    cache.put(unit(0, 1, 0), 1, ["y"])
+    cache.put(unit(0, 0, 1), 1, ["z"])
+
+    assert cache.get(unit(1, 0, 0), 1) is None
+    assert cache.get(unit(0, 1, 0), 1) == ["y"]
+    assert cache.get(unit(0, 0, 1), 1) == ["z"]
+    assert len(cache) == 2
+
+
+def test_search_cache_clear_drops_every_entry():
+    cache = SemanticSearchCache(max_size=4)
+    cache.put(unit(1, 0), 1, ["x"])
+    cache.clear()
+
+    assert cache.get(unit(1, 0), 1) is None
+    assert len(cache) == 0
+    cache.put(unit(0, 1), 1, ["y"])
+    assert cache.get(unit(0, 1), 1) == ["y"]
+
+
+def test_search_cache_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.infrastructure.cache.time.monotonic", lambda: now[0])
+    cache = SemanticSearchCache(max_size=4, ttl_seconds=60)
+    cache.put(unit(1, 0), 1, ["x"])
+
+    now[0] += 59
+    assert cache.get(unit(1, 0), 1) == ["x"]
+    now[0] += 2
+    assert cache.get(unit(1, 0), 1) is None
+
+
+def test_semantic_cache_ignores_queries_of_another_dimension():
+    cache = SemanticSearchCache(max_size=2)
+    cache.put(unit(1, 0), 1, ["x"])
+    assert cache.get(unit(1, 0, 0), 1) is None
+
+
+def test_semantic_cache_rejects_unknown_dtype():
+    with pytest.raises(ValueError):
+        SemanticSearchCache(dtype="float64")
+
+
+def test_answer_cache_returns_copies():
+    cache = SemanticAnswerCache(max_size=2, threshold=0.95)
+    cache.put(unit(1, 0), {"content": "respuesta", "references": []})
+
+    answer = cache.get(unit(1, 0))
+    answer["content"] = "modificada"
+    assert cache.get(unit(1, 0))["content"] == "respuesta"
+
+
+def test_answer_cache_of_size_zero_never_hits():
+    cache = SemanticAnswerCache(max_size=0)
+    cache.put(unit(1, 0), {"content": "respuesta"})
+    assert cache.get(unit(1, 0)) is None
+
+
+# RedisEmbeddingCache
+
+class FakeRedis:
+    """Just the commands RedisEmbeddingCache uses."""
+
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def set(self, key, value, ex=None):
+        self._commands.append((key, value, ex))
+
+    def execute(self):
+        for key, value, ex in self._commands:
+            self._client.values[key] = value
+            self._client.expiry[key] = ex
+
+
+class BrokenRedis:
+    def mget(self, keys):
+        raise ConnectionError("down")
+
+    def pipeline(self, transaction=True):
+        raise ConnectionError("down")
+
+
+def test_redis_cache_round_trips_embeddings_as_float32():
+    client = FakeRedis()
+    cache = RedisEmbeddingCache(client, model="text-embedding-3-large", ttl_seconds=60)
+    cache.put_many({"¿Qué es la verdad?": [0.5, -0.25, 1.0]})
+
+    assert cache.get_many(["¿qué es  la verdad?", "otra"]) == [[0.5, -0.25, 1.0], None]
+    assert set(client.expiry.values()) == {60}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_redis_cache_ttl_of_zero_stores_without_expiry():
+    client = FakeRedis()
+    RedisEmbeddingCache(client, model="m", ttl_seconds=0).put_many({"texto": [1.0]})
+    assert list(client.expiry.values()) == [None]
+
+
+def test_redis_cache_keys_depend_on_the_model():
+    client = FakeRedis()
+    RedisEmbeddingCache(client, model="a").put_many({"texto": [1.0]})
+    assert RedisEmbeddingCache(client, model="b").get_many(["texto"]) == [None]
+
+
+def test_redis_errors_are_treated_as_misses():
+    cache = RedisEmbeddingCache(BrokenRedis(), model="m")
+    cache.put_many({"texto": [1.0]})
+
+    assert cache.get_many(["texto", "otro"]) == [None, None]
+    assert cache.stats()["errors"] == 2
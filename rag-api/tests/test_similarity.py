@@ -0,0 +1,45 @@
+"""Tests for the vector similarity helpers."""
+
+import numpy as np
+
+from src.infrastructure.similarity import cosine_similarities, mmr_select, quantize_int8, top_k_indices, top_k_similar
+
+
+def test_top_k_indices_are_sorted_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 0]
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_cosine_similarities_ignore_vector_length():
+    matrix = np.array([[2.0, 0.0], [0.0, 3.0], [1.0, 1.0]], dtype=np.float32)
+    similarities = cosine_similarities(matrix, np.array([5.0, 0.0], dtype=np.float32))
+    assert np.allclose(similarities, [1.0, 0.0, np.sqrt(0.5)], atol=1e-6)
+
+
+def test_top_k_similar_with_unnormalised_rows():
+    matrix = np.array([[0.0, 4.0], [3.0, 0.1], [1.0, 1.0]], dtype=np.float32)
+    indices, scores = top_k_similar(matrix, np.array([1.0, 0.0], dtype=np.float32), 2, normalized=False)
+    assert indices.tolist() == [1, 2]
+    assert scores[0] > scores[1]
+
+
+def test_quantize_int8_round_trips_approximately():
+    vector = np.array([0.5, -1.0, 0.25], dtype=np.float32)
+    quantized, scale = quantize_int8(vector)
+    assert quantized.dtype == np.int8
+    assert np.allclose(quantized * scale, vector, atol=scale)
+
+
+def test_mmr_with_lambda_one_is_plain_top_k():
+    scores = np.array([0.9, 0.8, 0.1], dtype=np.float32)
+    vectors = np.eye(3, dtype=np.float32)
+    assert mmr_select(scores, vectors, 2, 1.0).tolist() == [0, 1]
+
+
+def test_mmr_skips_near_duplicates():
+    # Candidates 0 and 1 are the same passage; 2 is less relevant but different
+    vectors = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    scores = np.array([0.9, 0.89, 0.6], dtype=np.float32)
+    assert mmr_select(scores, vectors, 2, 0.5).tolist() == [0, 2]
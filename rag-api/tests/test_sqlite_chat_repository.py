@@ -0,0 +1,101 @@
+"""Tests for the SQLite chat session repository."""
+
+import asyncio
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from src.adapters.repositories.sqlite_chat_repository import SQLiteChatSessionRepository
+from src.domain.entities import ChatSession, Message
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return SQLiteChatSessionRepository(str(tmp_path / "chats.db"))
+
+
+def make_chat(*contents, session_id="session-1"):
+    now = datetime.now()
+    return ChatSession(
+        id=uuid4(),
+        title="Nuevo Chat",
+        session_id=session_id,
+        messages=[Message(content=content, is_bot=i % 2 == 1, timestamp=now) for i, content in enumerate(contents)],
+        created_at=now,
+        updated_at=now
+    )
+
+
+def contents(chat):
+    return [message.content for message in chat.messages]
+
+
+def test_save_and_find_round_trip(repository):
+    chat = make_chat("hola", "respuesta")
+    chat.messages[1].references = [{"title": "Informe", "link": "https://example.org"}]
+    asyncio.run(repository.save(chat))
+
+    loaded = asyncio.run(repository.find_by_id(chat.id))
+    assert contents(loaded) == ["hola", "respuesta"]
+    assert [message.is_bot for message in loaded.messages] == [False, True]
+    assert loaded.messages[1].references == [{"title": "Informe", "link": "https://example.org"}]
+    assert [c.id for c in asyncio.run(repository.find_by_session_id("session-1"))] == [chat.id]
+
+
+def test_save_appends_only_new_messages(repository):
+    chat = make_chat("uno", "dos")
+    asyncio.run(repository.save(chat))
+
+    chat.messages.append(Message(content="tres", timestamp=datetime.now()))
+    chat.title = "Otro título"
+    asyncio.run(repository.save(chat))
+    asyncio.run(repository.save(chat))
+
+    loaded = asyncio.run(repository.find_by_id(chat.id))
+    assert contents(loaded) == ["uno", "dos", "tres"]
+    assert loaded.title == "Otro título"
+
+
+def test_concurrent_appends_to_the_same_chat_are_both_kept(repository):
+    chat = make_chat("pregunta", "respuesta")
+    asyncio.run(repository.save(chat))
+
+    # Two workers load the same chat and each append a turn
+    first = asyncio.run(repository.find_by_id(chat.id))
+    second = asyncio.run(repository.find_by_id(chat.id))
+    first.messages += [Message(content="q1", timestamp=datetime.now()), Message(content="a1", is_bot=True, timestamp=datetime.now())]
+    second.messages += [Message(content="q2", timestamp=datetime.now()), Message(content="a2", is_bot=True, timestamp=datetime.now())]
+    asyncio.run(repository.save(first))
+    asyncio.run(repository.save(second))
+
+    loaded = asyncio.run(repository.find_by_id(chat.id))
+    assert contents(loaded) == ["pregunta", "respuesta", "q1", "a1", "q2", "a2"]
+
+
+def test_delete_removes_chat_and_messages(repository):
+    chat = make_chat("hola")
+    asyncio.run(repository.save(chat))
+
+    assert asyncio.run(repository.delete(chat.id))
+    assert asyncio.run(repository.find_by_id(chat.id)) is None
+    assert asyncio.run(repository.search_messages("hola")) == []
+
+
+def test_search_matches_word_prefixes(repository):
+    asyncio.run(repository.save(make_chat("La Comisión de la Verdad", "Informe final sobre desplazamiento")))
+    asyncio.run(repository.save(make_chat("Otra pregunta")))
+
+    results = asyncio.run(repository.search_messages("desplaza"))
+    assert [result["content"] for result in results] == ["Informe final sobre desplazamiento"]
+
+    results = asyncio.run(repository.search_messages("comisión verdad"))
+    assert [result["content"] for result in results] == ["La Comisión de la Verdad"]
+
+
+def test_search_handles_fts_syntax_characters(repository):
+    asyncio.run(repository.save(make_chat('¿Qué dijo "la comisión" (2022)?')))
+
+    results = asyncio.run(repository.search_messages('"comisión" (2022'))
+    assert len(results) == 1
+    assert asyncio.run(repository.search_messages('*')) == []
@@ -0,0 +1,59 @@
+"""Tests for draining blocking iterators from async code."""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.infrastructure.streaming import iterate_in_thread
+
+
+def test_items_are_yielded_in_order():
+    async def main():
+        return [item async for item in iterate_in_thread(lambda: iter(range(5)))]
+
+    assert asyncio.run(main()) == [0, 1, 2, 3, 4]
+
+
+def test_errors_are_raised_in_the_consumer():
+    def failing():
+        yield 1
+        raise ValueError("boom")
+
+    async def main():
+        received = []
+        with pytest.raises(ValueError):
+            async for item in iterate_in_thread(failing):
+                received.append(item)
+        return received
+
+    assert asyncio.run(main()) == [1]
+
+
+def test_abandoned_stream_stops_the_producer_and_closes_the_iterator():
+    produced = []
+    disconnected = threading.Event()
+    closed = threading.Event()
+
+    def answer():
+        try:
+            for i in range(1000):
+                if i == 2:
+                    disconnected.wait(timeout=2)
+                produced.append(i)
+                yield i
+        finally:
+            closed.set()
+
+    async def main():
+        stream = iterate_in_thread(answer)
+        received = [await stream.__anext__(), await stream.__anext__()]
+        # The client goes away mid-answer
+        await stream.aclose()
+        disconnected.set()
+        return received
+
+    assert asyncio.run(main()) == [0, 1]
+    assert closed.wait(timeout=2)
+    # At most the item being produced when the consumer left
+    assert len(produced) <= 3
@@ -0,0 +1,147 @@
+"""Tests for streaming answers through QuestionAnsweringUseCase."""
+
+import asyncio
+from datetime import datetime
+from uuid import uuid4
+
+from src.adapters.repositories.memory_chat_repository import InMemoryChatSessionRepository
+from src.adapters.repositories.sqlite_chat_repository import SQLiteChatSessionRepository
+from src.application.use_cases import QuestionAnsweringUseCase
+from src.domain.entities import ChatSession, Document, Question, RAGContext
+from src.domain.ports import EmbeddingService, LLMService, RAGContextBuilder, TimestampService, VectorDatabase
+
+
+class FixedTimestampService(TimestampService):
+    def get_current_timestamp(self) -> str:
+        return self.get_current_datetime().isoformat()
+
+    def get_current_datetime(self) -> datetime:
+        return datetime(2024, 1, 1, 12, 0)
+
+
+class FixedEmbeddingService(EmbeddingService):
+    async def generate_embedding(self, text):
+        return [1.0, 0.0]
+
+    async def generate_embeddings(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+    async def warm_up(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class OneDocumentVectorDatabase(VectorDatabase):
+    async def search_similar_documents(self, embedding, limit=5):
+        return [Document(content="Informe final", metadata={"title": "Informe"}, score=0.9)]
+
+    async def search_similar_documents_batch(self, embeddings, limit=5):
+        return [await self.search_similar_documents(embedding, limit) for embedding in embeddings]
+
+    async def verify_connection(self):
+        return True
+
+    async def warm_up(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class JoinedContextBuilder(RAGContextBuilder):
+    async def build_context(self, documents, question):
+        return RAGContext(documents=documents, context_text="\n".join(d.content for d in documents), references=[])
+
+
+class ScriptedLLMService(LLMService):
+    """Streams the given chunks, for both the tool and the plain RAG paths."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def generate_answer(self, question, context, chat_history):
+        return "".join(self.chunks)
+
+    async def stream_answer(self, question, context, chat_history):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def generate_answer_with_tools(self, question, chat_history):
+        return {"content": "".join(self.chunks), "references": []}
+
+    async def stream_answer_with_tools(self, question, chat_history):
+        for chunk in self.chunks:
+            yield {"type": "delta", "content": chunk}
+        yield {"type": "done", "result": {"content": "".join(self.chunks), "references": []}}
+
+
+def make_use_case(repository, chunks):
+    return QuestionAnsweringUseCase(
+        chat_repository=repository,
+        vector_db=OneDocumentVectorDatabase(),
+        embedding_service=FixedEmbeddingService(),
+        llm_service=ScriptedLLMService(chunks),
+        context_builder=JoinedContextBuilder(),
+        timestamp_service=FixedTimestampService()
+    )
+
+
+def make_chat(repository):
+    now = datetime.now()
+    chat = ChatSession(id=uuid4(), title="Nuevo Chat", session_id=None, messages=[], created_at=now, updated_at=now)
+    asyncio.run(repository.save(chat))
+    return chat
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def test_stream_yields_deltas_and_saves_the_answer():
+    for use_tools in (True, False):
+        repository = InMemoryChatSessionRepository()
+        chat = make_chat(repository)
+        use_case = make_use_case(repository, ["La ", "verdad"])
+
+        async def main():
+            return await collect(await use_case.stream_question(Question(text="¿Qué es?", chat_id=chat.id), use_tools=use_tools))
+
+        events = asyncio.run(main())
+        assert [event["content"] for event in events if event["type"] == "delta"] == ["La ", "verdad"]
+        assert events[-1]["type"] == "done"
+        assert events[-1]["message"].content == "La verdad"
+
+        saved = asyncio.run(repository.find_by_id(chat.id))
+        assert [message.content for message in saved.messages] == ["¿Qué es?", "La verdad"]
+        assert saved.title == "¿Qué es?"
+
+
+def test_question_is_saved_when_the_client_disconnects_mid_stream(tmp_path):
+    for use_tools in (True, False):
+        # SQLite, unlike the in-memory store, only holds what was explicitly saved
+        repository = SQLiteChatSessionRepository(str(tmp_path / f"chats-{use_tools}.db"))
+        chat = make_chat(repository)
+        use_case = make_use_case(repository, ["La ", "verdad"])
+
+        async def main():
+            events = await use_case.stream_question(Question(text="¿Qué es?", chat_id=chat.id), use_tools=use_tools)
+            # The client reads one delta, then goes away
+            await events.__anext__()
+            await events.aclose()
+
+        asyncio.run(main())
+        saved = asyncio.run(repository.find_by_id(chat.id))
+        assert [message.content for message in saved.messages] == ["¿Qué es?"]
+
+
+def test_missing_chat_raises_before_streaming():
+    use_case = make_use_case(InMemoryChatSessionRepository(), ["x"])
+
+    try:
+        asyncio.run(use_case.stream_question(Question(text="hola", chat_id=uuid4())))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
@@ -0,0 +1,88 @@
+"""Tests for the token budget helpers."""
+
+from src.infrastructure.tokens import (
+    MESSAGE_OVERHEAD_TOKENS,
+    count_message_tokens,
+    count_tokens,
+    recent_history,
+    trim_messages,
+)
+
+
+def message(content, is_bot=False):
+    return {"content": content, "is_bot": is_bot}
+
+
+def cost(*messages):
+    return sum(count_message_tokens(m) for m in messages)
+
+
+def test_count_tokens_of_empty_text_is_zero():
+    assert count_tokens("") == 0
+    assert count_tokens(None) == 0
+    assert count_message_tokens({"content": None}) == MESSAGE_OVERHEAD_TOKENS
+
+
+def test_count_tokens_grows_with_text():
+    assert 0 < count_tokens("verdad") < count_tokens("verdad " * 50)
+
+
+def test_recent_history_of_empty_history_is_empty():
+    assert recent_history([], 1000) == []
+
+
+def test_recent_history_keeps_everything_within_budget():
+    history = [message("uno"), message("dos", True), message("tres")]
+    assert recent_history(history, cost(*history)) == history
+
+
+def test_recent_history_keeps_the_newest_messages_that_fit():
+    history = [message("primera pregunta " * 20), message("respuesta", True), message("segunda")]
+    budget = cost(*history[1:])
+    assert recent_history(history, budget) == history[1:]
+
+
+def test_recent_history_stops_at_an_oversize_message():
+    # An older short message is not sent after a newer one that did not fit
+    history = [message("corto"), message("muy largo " * 500, True), message("última")]
+    assert recent_history(history, cost(history[0], history[2]) + 5) == [history[2]]
+
+
+def test_recent_history_drops_a_single_oversize_message():
+    assert recent_history([message("muy largo " * 500)], 10) == []
+
+
+def test_trim_messages_without_history_returns_messages_unchanged():
+    messages = [{"role": "system", "content": "sistema"}, {"role": "user", "content": "pregunta"}]
+    assert trim_messages(messages, 1, 1) is messages
+
+
+def test_trim_messages_keeps_everything_within_budget():
+    messages = [
+        {"role": "system", "content": "sistema"},
+        {"role": "user", "content": "antes"},
+        {"role": "assistant", "content": "respuesta"},
+        {"role": "user", "content": "pregunta"},
+    ]
+    assert trim_messages(messages, 3, cost(*messages)) == messages
+
+
+def test_trim_messages_drops_the_oldest_history_first():
+    system = {"role": "system", "content": "sistema"}
+    old = {"role": "user", "content": "pregunta antigua " * 30}
+    recent = {"role": "assistant", "content": "respuesta reciente"}
+    question = {"role": "user", "content": "pregunta"}
+
+    trimmed = trim_messages([system, old, recent, question], 3, cost(system, recent, question))
+    assert trimmed == [system, recent, question]
+
+
+def test_trim_messages_always_keeps_system_message_and_current_turn():
+    system = {"role": "system", "content": "sistema " * 100}
+    history = {"role": "user", "content": "antes"}
+    question = {"role": "user", "content": "pregunta " * 100}
+    tool_call = {"role": "assistant", "content": None, "tool_calls": []}
+
+    # The budget is smaller than what must be kept: only the history goes
+    trimmed = trim_messages([system, history, question, tool_call], 2, 10)
+    assert trimmed == [system, question, tool_call]
@@ -1,39 +1,59 @@
-import React from 'react';
+import React, { useMemo } from 'react';
 import { Typography, Box } from '@mui/material';
 
-const FormattedMessage = ({ content, isUser = false }) => {
-  // Función para procesar el texto y dividirlo en párrafos
-  const formatContent = (text) => {
-    if (!text) return [];
-    
-    // Dividir por párrafos y limpiar
-    const paragraphs = text
-      .split(/\n\s*\n/)
-      .filter(p => p.trim().length > 0)
-      .map(p => p.trim());
-    
-    return paragraphs;
-  };
+// Función para procesar el texto y dividirlo en párrafos
+const formatContent = (text) => {
+  if (!text) return [];
+  
+  // Dividir por párrafos y limpiar
+  const paragraphs = text
+    .split(/\n\s*\n/)
+    .filter(p => p.trim().length > 0)
+    .map(p => p.trim());
+  
+  return paragraphs;
+};
+
+// Función para procesar referencias [1], [2], etc.
+const processReferences = (text) => {
+  return text.replace(/\[(\d+)\]/g, (match, num) => {
+    return `<span class="chat-reference">[${num}]</span>`;
+  });
+};
+
+// Función para procesar texto con negritas y cursivas
+const processMarkdown = (text) => {
+  // Procesar negritas **texto**
+  text = text.replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>');
+  // Procesar cursivas *texto*
+  text = text.replace(/\*(.*?)\*/g, '<em>$1</em>');
+  // Procesar referencias
+  text = processReferences(text);
+  return text;
+};
 
-  // Función para procesar referencias [1], [2], etc.
-  const processReferences = (text) => {
-    return text.replace(/\[(\d+)\]/g, (match, num) => {
-      return `<span class="chat-reference">[${num}]</span>`;
-    });
-  };
+// Los mensajes del bot no cambian una vez recibidos: se cachea el HTML por contenido
+const MAX_CACHED_MESSAGES = 500;
+const renderedCache = new Map();
 
-  // Función para procesar texto con negritas y cursivas
-  const processMarkdown = (text) => {
-    // Procesar negritas **texto**
-    text = text.replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>');
-    // Procesar cursivas *texto*
-    text = text.replace(/\*(.*?)\*/g, '<em>$1</em>');
-    // Procesar referencias
-    text = processReferences(text);
-    return text;
-  };
+const renderBotParagraphs = (content) => {
+  let rendered = renderedCache.get(content);
+  if (rendered === undefined) {
+    rendered = formatContent(content).map(processMarkdown);
+    if (renderedCache.size >= MAX_CACHED_MESSAGES) {
+      renderedCache.delete(renderedCache.keys().next().value);
+    }
+    renderedCache.set(content, rendered);
+  }
+  return rendered;
+};
 
-  const paragraphs = formatContent(content);
+const FormattedMessage = ({ content, isUser = false }) => {
+  // Los mensajes del usuario no contienen markdown y se muestran como texto plano
+  const paragraphs = useMemo(
+    () => (isUser ? formatContent(content) : renderBotParagraphs(content)),
+    [content, isUser]
+  );
 
   return (
     <Box
@@ -81,13 +101,13 @@ const FormattedMessage = ({ content, isUser = false }) => {
               fontStyle: 'italic',
             }
           }}
-          dangerouslySetInnerHTML={{
-            __html: processMarkdown(paragraph)
-          }}
+          {...(isUser
+            ? { children: paragraph }
+            : { dangerouslySetInnerHTML: { __html: paragraph } })}
         />
       ))}
     </Box>
   );
 };
 
-export default FormattedMessage;
+export default React.memo(FormattedMessage);
@@ -8,6 +8,11 @@ import { Send as SendIcon, ArrowBack as ArrowBackIcon } from '@mui/icons-materia
 import ReactMarkdown from 'react-markdown';
 import { apiService } from '../services/api';
 
+// Memoized so re-renders caused by typing do not re-parse the whole history
+const BotMarkdown = React.memo(({ content }) => (
+  <ReactMarkdown>{content}</ReactMarkdown>
+));
+
 const ChatView = () => {
   const { chatId } = useParams();
   const navigate = useNavigate();
@@ -282,9 +287,7 @@ const ChatView = () => {
                       boxShadow: msg.is_bot ? 1 : 'none'
                     }}>
                       {msg.is_bot ? (
-                        <ReactMarkdown>
-                          {msg.content}
-                        </ReactMarkdown>
+                        <BotMarkdown content={msg.content} />
                       ) : (
                         <Typography>{msg.content}</Typography>
                       )}
@@ -15,6 +15,94 @@ import WindowContainer from '../components/WindowContainer';
 import Sidebar from '../components/Sidebar';
 import WelcomeScreen from '../components/WelcomeScreen';
 
+// Defined once so ReactMarkdown receives a stable renderer map
+const markdownComponents = {
+  h3: ({ children }) => {
+    if (children && children.toString().toLowerCase().includes('sources')) {
+      // Hide sources section completely
+      return null;
+    }
+    return <Typography variant="h6" sx={{ mt: 2, mb: 1, fontWeight: 'bold' }}>{children}</Typography>;
+  },
+  p: ({ children }) => {
+    const text = children?.toString() || '';
+    // Hide source citations and "Sources" text completely
+    if (text.includes('ISBN') && text.includes('CEV') || 
+        text.toLowerCase().includes('sources') ||
+        text.toLowerCase() === 'sources') {
+      return null;
+    }
+    return <Typography variant="body1" sx={{ mb: 1.5, lineHeight: 1.6 }}>{children}</Typography>;
+  },
+  ol: ({ children }) => (
+    <Box component="ol" sx={{ pl: 2, mb: 2 }}>
+      {children}
+    </Box>
+  ),
+  ul: ({ children }) => (
+    <Box component="ul" sx={{ pl: 2, mb: 2 }}>
+      {children}
+    </Box>
+  ),
+  li: ({ children }) => {
+    const text = children?.toString() || '';
+    // Hide source citations and "Sources" text in list items
+    if (text.includes('ISBN') && text.includes('CEV') || 
+        text.toLowerCase().includes('sources') ||
+        text.toLowerCase() === 'sources') {
+      return null;
+    }
+    return (
+      <Box component="li" sx={{ mb: 0.5 }}>
+        <Typography variant="body1">{children}</Typography>
+      </Box>
+    );
+  },
+  strong: ({ children }) => (
+    <Typography component="span" sx={{ fontWeight: 'bold' }}>
+      {children}
+    </Typography>
+  ),
+  em: ({ children }) => (
+    <Typography component="span" sx={{ fontStyle: 'italic' }}>
+      {children}
+    </Typography>
+  ),
+  references: ({ children }) => (
+    <Box sx={{ 
+      mt: 3,
+      p: 2,
+      bgcolor: '#f8f9fa',
+      borderRadius: 2,
+      border: '1px solid #e0e0e0'
+    }}>
+      <Typography 
+        variant="h6" 
+        sx={{ 
+          mb: 2,
+          fontWeight: 'bold',
+          color: '#1e3a8a',
+          display: 'flex',
+          alignItems: 'center'
+        }}
+      >
+        📚 Referencias
+      </Typography>
+      <Box sx={{ pl: 1 }}>
+        {children}
+      </Box>
+    </Box>
+  )
+};
+
+// Bot messages never change once received; memoize so typing in the input
+// does not re-parse the markdown of every message in the history
+const BotMarkdown = React.memo(({ content }) => (
+  <ReactMarkdown components={markdownComponents}>
+    {content}
+  </ReactMarkdown>
+));
+
 const UnifiedChatInterface = () => {
   const { chatId } = useParams();
   const navigate = useNavigate();
@@ -357,87 +445,7 @@ const UnifiedChatInterface = () => {
                 }}>
                   {msg.is_bot ? (
                     <Box>
-                      <ReactMarkdown
-                        components={{                        h3: ({ children }) => {
-                          if (children && children.toString().toLowerCase().includes('sources')) {
-                            // Hide sources section completely
-                            return null;
-                          }
-                          return <Typography variant="h6" sx={{ mt: 2, mb: 1, fontWeight: 'bold' }}>{children}</Typography>;
-                        },
-                          p: ({ children }) => {
-                            const text = children?.toString() || '';
-                            // Hide source citations and "Sources" text completely
-                            if (text.includes('ISBN') && text.includes('CEV') || 
-                                text.toLowerCase().includes('sources') ||
-                                text.toLowerCase() === 'sources') {
-                              return null;
-                            }
-                            return <Typography variant="body1" sx={{ mb: 1.5, lineHeight: 1.6 }}>{children}</Typography>;
-                          },
-                          ol: ({ children }) => (
-                            <Box component="ol" sx={{ pl: 2, mb: 2 }}>
-                              {children}
-                            </Box>
-                          ),
-                          ul: ({ children }) => (
-                            <Box component="ul" sx={{ pl: 2, mb: 2 }}>
-                              {children}
-                            </Box>
-                          ),
-                          li: ({ children }) => {
-                            const text = children?.toString() || '';
-                            // Hide source citations and "Sources" text in list items
-                            if (text.includes('ISBN') && text.includes('CEV') || 
-                                text.toLowerCase().includes('sources') ||
-                                text.toLowerCase() === 'sources') {
-                              return null;
-                            }
-                            return (
-                              <Box component="li" sx={{ mb: 0.5 }}>
-                                <Typography variant="body1">{children}</Typography>
-                              </Box>
-                            );
-                          },
-                          strong: ({ children }) => (
-                            <Typography component="span" sx={{ fontWeight: 'bold' }}>
-                              {children}
-                            </Typography>
-                          ),
-                          em: ({ children }) => (
-                            <Typography component="span" sx={{ fontStyle: 'italic' }}>
-                              {children}
-                            </Typography>
-                          ),
-                          references: ({ children }) => (
-                            <Box sx={{ 
-                              mt: 3,
-                              p: 2,
-                              bgcolor: '#f8f9fa',
-                              borderRadius: 2,
-                              border: '1px solid #e0e0e0'
-                            }}>
-                              <Typography 
-                                variant="h6" 
-                                sx={{ 
-                                  mb: 2,
-                                  fontWeight: 'bold',
-                                  color: '#1e3a8a',
-                                  display: 'flex',
-                                  alignItems: 'center'
-                                }}
-                              >
-                                📚 Referencias
-                              </Typography>
-                              <Box sx={{ pl: 1 }}>
-                                {children}
-                              </Box>
-                            </Box>
-                          )
-                        }}
-                      >
-                        {msg.content}
-                      </ReactMarkdown>
+                      <BotMarkdown content={msg.content} />
                       
                       {/* Render references if they exist */}
                       {msg.references && msg.references.length > 0 && (